@@ -0,0 +1,71 @@
+import queue
+import threading
+from typing import List
+from simulation import Simulator, Frame
+
+# Runs a Simulator in a worker thread and hands its frames to another thread (the visualizer's) through a bounded queue,
+# so they can be drawn while the simulation goes on. Pass it as the simulator's sink:
+#
+#   feed = BackgroundSimulation()
+#   sim = Simulator(config, sink=feed)
+#   feed.start(sim)
+#   frames = feed.take(100)    # never blocks unless block=True; feed.over is set once every frame has been taken
+#
+# When the queue is full the simulation waits for frames to be taken, so it never runs more than maxsize frames ahead
+# of the reader. Nothing but the frames crosses threads; the simulator itself must not be used until feed.over is set.
+
+class BackgroundSimulation:
+    def __init__(self, maxsize : int = 1024):
+        self.queue : "queue.Queue[Frame | None]" = queue.Queue(maxsize)
+        self.stopped = threading.Event()
+        self.over = False # the end of the simulation has been taken
+        self.error : Exception | None = None
+        self.thread : threading.Thread | None = None
+
+    def start(self, sim : Simulator):
+        self.thread = threading.Thread(target=self.run, args=(sim,), name="simulation", daemon=True)
+        self.thread.start()
+
+    def run(self, sim : Simulator):
+        try:
+            while not self.stopped.is_set() and sim.advance():
+                pass
+        except Exception as e: # raised again by take, in the reader's thread
+            self.error = e
+        finally:
+            self.put(None)
+
+    # Waits for room in the queue, unless stopped
+    def put(self, item : Frame | None):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    # Sink interface (see Simulator)
+    def write(self, frame : Frame, processes):
+        self.put(frame)
+
+    # Up to n of the frames produced so far, in order; with block=True, waits until there is at least one or the
+    # simulation is over. Raises the exception that ended the simulation, if any
+    def take(self, n : int, block : bool = False) -> List[Frame]:
+        frames : List[Frame] = list()
+        while len(frames) < n and not self.over:
+            try:
+                f = self.queue.get(block and not frames)
+            except queue.Empty:
+                break
+            if f == None:
+                self.over = True
+                if self.error != None: raise self.error
+            else:
+                frames.append(f)
+        return frames
+
+    # Ends the simulation early; frames not taken yet are dropped
+    def stop(self):
+        self.stopped.set()
+        if self.thread != None:
+            self.thread.join()
@@ -0,0 +1,176 @@
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import List, Dict, Any
+from simulation import Simulator
+from workload import WorkloadGenerator
+from layout import LayoutStats
+
+# Throughput benchmarks over a matrix of process count, CPU queue nesting depth, policy and pre-emption.
+#
+# Every case builds a CPU tree of the given depth whose queues all use the policy under test (depth 1 is a single
+# CPU queue, each extra level splits every leaf in two), a single FIFO IO queue, and a synthetic workload from
+# workload.py whose processes all arrive during the first half of the run. The simulation loop is timed in ticks
+# (simulated time units) and frames per second; unless disabled, GraphicsInfo layout and draw_frame are timed too.
+# Rendering needs a display, and is skipped when tkinter can't open one.
+#
+# Results are written as JSON: {"meta": {...}, "results": [one record per case]}, so that runs from different
+# commits can be compared with --compare.
+
+POLICIES = ["FIFO", "SJF", "SRTF", "Priority", "RR 2"]
+
+def build_queue(name : str, depth : int, mode : str, preemptive : bool, width : int = 2) -> dict:
+    q = {"name": name, "mode": mode, "color": "#aaffaa", "preemptive": preemptive}
+    if depth > 1:
+        q["subqueues"] = [build_queue(f"{name}.{i}", depth - 1, mode, preemptive, width) for i in range(width)]
+        for i, sq in enumerate(q["subqueues"]):
+            sq["priority"] = i
+    return q
+
+def build_config(depth : int, mode : str, preemptive : bool, ticks : int) -> dict:
+    return {
+        "queue_cpu": build_queue("CPU", depth, mode, preemptive),
+        "queue_io": {"name": "IO", "mode": "FIFO", "color": "#ffff00", "preemptive": False},
+        "options": {"horizon": ticks - 1, "log_level": "OFF"},
+        "graphics": {}
+    }
+
+def build_spec(processes : int, ticks : int) -> dict:
+    return {"count": processes, "arrivals": {"process": "poisson", "rate": 2 * processes / ticks}}
+
+def case_name(case : dict) -> str:
+    return f"{case['processes']}p/d{case['depth']}/{case['policy']}/{'pre' if case['preemptive'] else 'nonpre'}"
+
+def load_renderer():
+    try:
+        import fsosched
+    except Exception as e: # tkinter.TclError when there's no display
+        print(f"Rendering isn't benchmarked: {e}", file=sys.stderr)
+        return None
+    return fsosched
+
+def time_simulation(config : dict, spec : dict, seed : int, event_driven : bool, trace : bool) -> "tuple[float, Simulator]":
+    sim = Simulator(config, event_driven=event_driven, trace=trace, seed=seed, processes=WorkloadGenerator(spec, config, seed))
+    start = time.perf_counter()
+    sim.run()
+    return time.perf_counter() - start, sim
+
+# Times GraphicsInfo construction and draw_frame over the first max_frames frames, in an unmapped window
+def time_render(fsosched, config : dict, sim : Simulator, max_frames : int) -> "tuple[float, float, int]":
+    start = time.perf_counter()
+    graph = fsosched.GraphicsInfo(config["graphics"], sim.cpu_queue, sim.io_queue, LayoutStats.from_simulator(sim))
+    layout = time.perf_counter() - start
+    win = fsosched.GraphWin("benchmark", graph.width, graph.height, autoflush=False)
+    win.master.withdraw()
+    n = min(max_frames, len(sim.frames))
+    start = time.perf_counter()
+    for i in range(n):
+        graph.draw_frame(sim.frames[i], win)
+    fsosched.update()
+    draw = time.perf_counter() - start
+    win.close()
+    return layout, draw, n
+
+# Runs one case; repeat > 1 keeps the fastest of the repetitions of each measurement
+def run_case(case : dict, ticks : int, repeat : int = 1, seed : int = 0, event_driven : bool = False, trace : bool = False,
+             fsosched = None, render_frames : int = 500) -> dict:
+    config = build_config(case["depth"], case["policy"], case["preemptive"], ticks)
+    spec = build_spec(case["processes"], ticks)
+    record : Dict[str, Any] = {"case": case_name(case), **case}
+    best, sim = None, None
+    for _ in range(repeat):
+        elapsed, sim = time_simulation(config, spec, seed, event_driven, trace)
+        best = elapsed if best == None else min(best, elapsed)
+    record["ticks"] = sim.t_now
+    record["frames"] = len(sim.frames)
+    record["sim_seconds"] = best
+    record["ticks_per_second"] = sim.t_now / best if best else None
+    record["frames_per_second"] = len(sim.frames) / best if best else None
+    if fsosched != None:
+        layout, draw = None, None
+        for _ in range(repeat):
+            l, d, n = time_render(fsosched, config, sim, render_frames)
+            layout = l if layout == None else min(layout, l)
+            draw = d if draw == None else min(draw, d)
+        record["layout_seconds"] = layout
+        record["drawn_frames"] = n
+        record["draw_seconds"] = draw
+        record["draw_frames_per_second"] = n / draw if draw else None
+    return record
+
+def cases(processes : List[int], depths : List[int], policies : List[str], preemption : List[bool]) -> List[dict]:
+    return [{"processes": n, "depth": d, "policy": p, "preemptive": pre} for n, d, p, pre in itertools.product(processes, depths, policies, preemption)]
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Prints the ratio of every measured rate to the same case of an earlier results file; above 1 is faster
+def compare(results : List[dict], baseline : List[dict]):
+    old = {r["case"]: r for r in baseline}
+    keys = ["ticks_per_second", "draw_frames_per_second"]
+    print("case\t" + "\t".join(keys))
+    for r in results:
+        o = old.get(r["case"])
+        if o == None: continue
+        ratios = [f"{r[k] / o[k]:.2f}x" if r.get(k) and o.get(k) else "-" for k in keys]
+        print(r["case"] + "\t" + "\t".join(ratios))
+
+def parse_list(s : str, kind = str) -> list:
+    return [kind(v) for v in s.split(",")]
+
+def parse_bool(s : str) -> bool:
+    if s.lower() in ["true", "1", "yes"]: return True
+    if s.lower() in ["false", "0", "no"]: return False
+    raise ValueError(f"Not a boolean: {s}")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Measures simulation and rendering throughput over a matrix of workloads and queue configurations")
+    parser.add_argument("-p", "--processes", default="100,1000", help="process counts")
+    parser.add_argument("-d", "--depths", default="1,2,3", help="CPU queue nesting depths")
+    parser.add_argument("--policies", default=",".join(POLICIES), help="queue policies")
+    parser.add_argument("--preemption", default="false,true", help="pre-emption settings")
+    parser.add_argument("-t", "--ticks", type=int, default=2000, help="time units simulated per case")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="repetitions per case; the fastest is kept")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--event-driven", action="store_true")
+    parser.add_argument("--trace", action="store_true", help="record an event log instead of frames")
+    parser.add_argument("--no-render", action="store_true", help="only benchmark the simulation loop")
+    parser.add_argument("--render-frames", type=int, default=500, help="frames drawn per case")
+    parser.add_argument("-o", "--out", default="benchmark.json")
+    parser.add_argument("--compare", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    fsosched = None if args.no_render else load_renderer()
+    matrix = cases(parse_list(args.processes, int), parse_list(args.depths, int), parse_list(args.policies), parse_list(args.preemption, parse_bool))
+    results = list()
+    for case in matrix:
+        r = run_case(case, args.ticks, args.repeat, args.seed, args.event_driven, args.trace, fsosched, args.render_frames)
+        results.append(r)
+        line = f"{r['case']}: {r['ticks_per_second']:.0f} ticks/s, {r['frames_per_second']:.0f} frames/s"
+        if "draw_frames_per_second" in r:
+            line += f", layout {r['layout_seconds'] * 1000:.1f} ms, {r['draw_frames_per_second']:.0f} drawn frames/s"
+        print(line)
+
+    meta = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ticks": args.ticks,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "event_driven": args.event_driven,
+        "trace": args.trace
+    }
+    with open(args.out, "w") as out:
+        json.dump({"meta": meta, "results": results}, out, indent=1)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(results, json.load(f)["results"])
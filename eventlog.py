@@ -0,0 +1,152 @@
+from array import array
+from typing import List, Dict, Iterator
+from simulation import Task, ProcessTable, Queue, GroupInfo, Frame, queued_processes
+
+# Event kinds; every event is a tuple whose first item is its kind. Processes are given by their id
+ENQUEUE = 0   # (ENQUEUE, queue, task, position) task is a subqueue or a process
+DEQUEUE = 1   # (DEQUEUE, queue) the head leaves the queue (completed burst or emptied subqueue)
+PREEMPT = 2   # (PREEMPT, queue) the head leaves the queue to be inserted again
+DISPATCH = 3  # (DISPATCH, root queue, process | None) the active process of a root changed
+BURST = 4     # (BURST, process, time units)
+COMPLETE = 5  # (COMPLETE, process, time)
+
+# Queue contents and process progress at some point of the log
+class LogState:
+    def __init__(self, log : "EventLog | None" = None):
+        self.position : int = 0 # number of events applied
+        self.tasks : Dict[Queue, List[Task | int]] = dict()
+        # progress of the processes that have run but not completed; the others are either still at the start of their
+        # first burst or done, and never queued again. Dropping the completed ones keeps checkpoints as small as the queues
+        self.rem : Dict[int, int] = dict()
+        self.burst_i : Dict[int, int] = dict()
+        self.processes : ProcessTable | None = None
+        if log != None:
+            self.tasks = {q: list() for q in log.queues}
+            self.processes = log.processes
+
+    def copy(self) -> "LogState":
+        c = LogState()
+        c.processes = self.processes
+        c.position = self.position
+        c.tasks = {q: list(tl) for q, tl in self.tasks.items()}
+        c.rem = dict(self.rem)
+        c.burst_i = dict(self.burst_i)
+        return c
+
+    def apply(self, e : tuple):
+        kind = e[0]
+        if kind == BURST:
+            p = e[1]
+            self.rem[p] = self.get_rem(p) - e[2]
+            if self.rem[p] <= 0:
+                self.burst_i[p] = self.burst_i.get(p, 0) + 1
+                b = self.processes.start[p] + self.burst_i[p]
+                if b < self.processes.start[p + 1]:
+                    self.rem[p] = self.processes.bursts[b]
+                else:
+                    del self.rem[p]
+                    del self.burst_i[p]
+        elif kind == ENQUEUE:
+            self.tasks[e[1]].insert(e[3], e[2])
+        elif kind == DEQUEUE or kind == PREEMPT:
+            self.tasks[e[1]].pop(0)
+        self.position += 1
+
+    def get_rem(self, p : int) -> int:
+        r = self.rem.get(p)
+        return r if r != None else self.processes.bursts[self.processes.start[p]]
+
+    def active(self, q : Queue) -> "tuple[Queue, int | None]":
+        tl = self.tasks[q]
+        if not tl:
+            return q, None
+        if isinstance(tl[0], Queue):
+            return self.active(tl[0])
+        return q, tl[0]
+
+# Append-only record of every scheduling state change, from which any frame can be rebuilt on demand.
+# Behaves as a read-only sequence of frames, so it can be used wherever the list of frames is.
+class EventLog:
+    def __init__(self, roots : List[Queue], processes : ProcessTable, checkpoint_interval : int = 1024):
+        self.roots = roots
+        self.leaves : Dict[Queue, List[Queue]] = {q: q.get_process_queues() for q in roots}
+        self.queues : List[Queue] = list()
+        for q in roots:
+            self._extract_queues(q)
+        self.processes : ProcessTable = processes # shared with the simulator, which adds streamed processes to it
+
+        self.events : List[tuple] = list()
+        self.frame_pos = array("q") # number of events recorded when each frame was taken
+        self.frame_t = array("q")
+        self.frame_span = array("q")
+        self.dispatched : Dict[Queue, int | None] = {q: None for q in roots}
+
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints : List[LogState] = list() # state at every checkpoint_interval-th frame
+        self.cursor : LogState | None = None
+
+    def _extract_queues(self, q : Queue):
+        self.queues.append(q)
+        for sq in q.subqueues:
+            self._extract_queues(sq)
+
+    def enqueue(self, q : Queue, task : Task | int, pos : int):
+        self.events.append((ENQUEUE, q, task, pos))
+
+    def dequeue(self, q : Queue):
+        self.events.append((DEQUEUE, q))
+
+    def preempt(self, q : Queue):
+        self.events.append((PREEMPT, q))
+
+    def burst(self, p : int, n : int):
+        self.events.append((BURST, p, n))
+
+    def complete(self, p : int, t : int):
+        self.events.append((COMPLETE, p, t))
+
+    def record_frame(self, t : int, span : int = 1):
+        for q in self.roots:
+            p = q.get_active_process()
+            if p != self.dispatched[q]:
+                self.dispatched[q] = p
+                self.events.append((DISPATCH, q, p))
+        self.frame_pos.append(len(self.events))
+        self.frame_t.append(t)
+        self.frame_span.append(span)
+
+    def __len__(self) -> int:
+        return len(self.frame_pos)
+
+    def __iter__(self) -> Iterator[Frame]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, n : int) -> Frame:
+        if n < 0: n += len(self)
+        if not 0 <= n < len(self): raise IndexError("frame index out of range")
+        return self.build_frame(self.state_at(n), n)
+
+    def state_at(self, n : int) -> LogState:
+        target = self.frame_pos[n]
+        ci = min(n // self.checkpoint_interval, len(self.checkpoints) - 1)
+        if self.cursor == None or self.cursor.position > target or (ci >= 0 and self.checkpoints[ci].position > self.cursor.position):
+            self.cursor = self.checkpoints[ci].copy() if ci >= 0 else LogState(self)
+
+        state = self.cursor
+        while True:
+            ni = len(self.checkpoints) * self.checkpoint_interval
+            while ni < len(self) and state.position == self.frame_pos[ni]:
+                self.checkpoints.append(state.copy())
+                ni += self.checkpoint_interval
+            if state.position >= target:
+                return state
+            state.apply(self.events[state.position])
+
+    def build_frame(self, state : LogState, n : int) -> Frame:
+        groups : Dict[str, GroupInfo] = dict()
+        for q in self.roots:
+            leaf, p = state.active(q)
+            tasks = tuple(tuple(state.tasks[lq]) for lq in self.leaves[q])
+            groups[q.name] = GroupInfo.from_state(p, state.get_rem(p) if p != None else 0, leaf.name if p != None else "", self.leaves[q], tasks)
+        return Frame.from_state(self.frame_t[n], self.frame_span[n], groups, [state.get_rem(p) for p in queued_processes(groups)], self.processes)
@@ -0,0 +1,175 @@
+import json
+from array import array
+from typing import List, Dict, Iterable, Iterator
+from simulation import Queue, QueueTree, Process, ProcessTable, GroupInfo, Frame
+
+# JSON Lines recording of a simulation: a header record with the queue configuration, then a process record the
+# first time each process shows up and one frame record per frame. Only the remaining time of the processes that
+# are in some queue is stored with each frame.
+#
+# A run length recording (FrameWriter(..., run_length=True)) only stores a frame when the queue membership or the
+# running processes change: the frames in between, where only the running processes' remaining time went down, are
+# folded into the span of the last frame stored. Read it back through simulation.ExpandedFrames to get a row per
+# time unit again.
+
+FRAME_PREFIX = '{"type":"frame"' # how every frame record starts, so frames can be told apart without parsing them
+FRAME_PREFIX_BYTES = FRAME_PREFIX.encode()
+
+def process_record(p : Process) -> dict:
+    return {
+        "type": "process",
+        "name": p.name,
+        "color": p.color,
+        "arrival_time": p.arrival_time,
+        "priority": p.priority,
+        "bursts": p.bursts,
+        "queues": p.queues
+    }
+
+def frame_record(f : Frame) -> dict:
+    name = f.processes.name
+    groups = dict()
+    for n, g in f.groups.items():
+        groups[n] = {
+            "process": name(g.process) if g.process != None else None,
+            "pt": g.pt,
+            "active_queue": g.active_queue,
+            "tasks": {q.name: [name(p) for p in pl] for q, pl in zip(g.pqueues, g.tasks)}
+        }
+    allpt = {name(p): r for p, r in zip(f.queued(), f.rem)}
+    return {"type": "frame", "t": f.t, "span": f.span, "groups": groups, "allpt": allpt}
+
+# Frame sink for Simulator that writes every frame to a file as soon as it is produced; with run_length, as soon as
+# the next frame doesn't continue it (see Frame.continues). The writer may extend the span of the frames it is given
+class FrameWriter:
+    def __init__(self, path : str, config : dict, run_length : bool = False):
+        self.file = open(path, "w")
+        self.run_length = run_length
+        self.pending : Frame | None = None # last frame given, not written yet in run length mode
+        self.processes_written = 0
+        self.frames_written = 0
+        self.write_record({"type": "header", "queue_cpu": config["queue_cpu"], "queue_io": config["queue_io"]})
+    
+    def write_record(self, record : dict):
+        self.file.write(json.dumps(record, separators=(",", ":")))
+        self.file.write("\n")
+    
+    def write(self, frame : Frame, processes : ProcessTable):
+        while self.processes_written < len(processes):
+            self.write_record(process_record(processes[self.processes_written]))
+            self.processes_written += 1
+        if not self.run_length:
+            self.write_frame(frame)
+        elif self.pending != None and frame.continues(self.pending):
+            self.pending.span += frame.span
+        else:
+            if self.pending != None: self.write_frame(self.pending)
+            self.pending = frame
+    
+    def write_frame(self, frame : Frame):
+        self.write_record(frame_record(frame))
+        self.frames_written += 1
+    
+    def close(self):
+        if self.pending != None:
+            self.write_frame(self.pending)
+            self.pending = None
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+# Reads a file written by FrameWriter; iterating it yields the frames one at a time.
+# Processes are loaded into self.processes as their records are read.
+class FrameReader:
+    def __init__(self, path : str):
+        self.path = path
+        with open(path, "r") as f:
+            header = json.loads(f.readline())
+        if header.get("type") != "header":
+            raise ValueError(f"{path} is not a frame recording")
+        self.cpu_queue = Queue(header["queue_cpu"])
+        self.io_queue = Queue(header["queue_io"])
+        self.tree = QueueTree([self.cpu_queue, self.io_queue])
+        self.processes = ProcessTable(self.tree)
+        self.by_name : Dict[str, int] = dict() # process ids
+        self.leaves : Dict[str, List[Queue]] = {q.name: [self.tree.queues[i] for i in self.tree.leaves[q.id]] for q in self.tree.roots}
+    
+    def __iter__(self) -> Iterator[Frame]:
+        with open(self.path, "r") as f:
+            f.readline()
+            for line in f:
+                r = json.loads(line)
+                if r["type"] == "frame":
+                    yield self.build_frame(r)
+                else:
+                    self.add_records((r,))
+    
+    # Yields frames start to stop - 1 only; the other frame records are skipped without being parsed.
+    # offset is the byte offset of frame start's record, if known (see count_frames): reading then starts there, and the
+    # records of the processes these frames show that come before it must have been given to add_records beforehand
+    def frame_range(self, start : int, stop : int, offset : int | None = None) -> Iterator[Frame]:
+        for r in self.frame_records(start, stop, offset):
+            yield self.build_frame(r)
+    
+    # Same as frame_range, but yields the frame records as parsed, without building frames out of them; the process
+    # records met on the way are still loaded
+    def frame_records(self, start : int, stop : int, offset : int | None = None) -> Iterator[dict]:
+        with open(self.path, "rb") as f:
+            if offset == None:
+                f.readline()
+                n = 0
+            else:
+                f.seek(offset)
+                n = start
+            for line in f:
+                if line.startswith(FRAME_PREFIX_BYTES):
+                    if start <= n < stop:
+                        yield json.loads(line)
+                    n += 1
+                    if n >= stop:
+                        return
+                else:
+                    self.add_records((json.loads(line),))
+    
+    def add_records(self, records : Iterable[dict]):
+        for r in records:
+            if r["type"] == "process" and r["name"] not in self.by_name:
+                self.by_name[r["name"]] = self.processes.add(r)
+    
+    # Also indexes the file on the way, without parsing the frame records: self.frame_offsets gets the byte offset of
+    # every frame record, and self.process_lines the byte offset and the line of every process record, by name
+    def count_frames(self) -> int:
+        self.frame_offsets = array("q")
+        self.process_lines : Dict[str, tuple] = dict()
+        with open(self.path, "rb") as f:
+            offset = len(f.readline())
+            for line in f:
+                if line.startswith(FRAME_PREFIX_BYTES):
+                    self.frame_offsets.append(offset)
+                else:
+                    r = json.loads(line)
+                    if r["type"] == "process" and r["name"] not in self.process_lines:
+                        self.process_lines[r["name"]] = (offset, line)
+                offset += len(line)
+        return len(self.frame_offsets)
+    
+    def build_frame(self, r : dict) -> Frame:
+        groups : Dict[str, GroupInfo] = dict()
+        allpt = r["allpt"]
+        rem = list() # in the order of queued_processes
+        for n, g in r["groups"].items():
+            p = self.by_name[g["process"]] if g["process"] != None else None
+            names = [g["tasks"][lq.name] for lq in self.leaves[n]]
+            tasks = tuple(tuple(self.by_name[pn] for pn in pl) for pl in names)
+            rem += [allpt[pn] for pl in names for pn in pl]
+            groups[n] = GroupInfo.from_state(p, g["pt"], g["active_queue"], self.leaves[n], tasks)
+        return Frame.from_state(r["t"], r["span"], groups, rem, self.processes)
+    
+    # Reads the whole file; returns the frames and every process in it
+    def load(self) -> "tuple[List[Frame], ProcessTable]":
+        frames = list(self)
+        return frames, self.processes
@@ -50,6 +50,11 @@ Various attributes of graphical objects can be set such as
 outline-color, fill-color and line-width. Graphical objects also
 support moving and hiding for animation effects.
 
+Shapes that don't need to be manipulated one by one can be drawn in
+bulk with a ShapeBatch: it collects rectangles, polygons, lines and
+texts with their options and tags, and creates all of them with a
+single Tk call. Batched items are plain canvas items, addressed by tag.
+
 The library also provides a very simple class for pixel-based image
 manipulation, Pixmap. A pixmap can be loaded from a file and displayed
 using an Image object. Both getPixel and setPixel methods are provided
@@ -160,7 +165,7 @@ __version__ = "5.0"
 #     Added ability to set text atttributes.
 #     Added Entry boxes.
 
-import time, os, sys
+import time, os, sys, re
 
 import tkinter as tk
 
@@ -394,6 +399,15 @@ class GraphWin(tk.Canvas):
             item.undraw()
             item.draw(self)
         self.update()
+
+    def drawShapes(self, kind, shapes, tags=(), **options):
+        """Draw every shape in shapes (flat coordinate sequences) as a
+        canvas item of kind "rectangle", "polygon", "line" or "oval",
+        all with the same options and tags, in a single Tk call"""
+        batch = ShapeBatch(tags)
+        for coords in shapes:
+            batch.add(kind, coords, **options)
+        batch.draw(self)
         
                       
 class Transform:
@@ -953,6 +967,63 @@ class Image(GraphicsObject):
         self.img.write( filename, format=ext)
 
         
+_TCL_SPECIAL = re.compile(r'([\\\[\]{}$"; \t])')
+
+def _tclWord(value):
+    # Quotes value as a single Tcl word; sequences become Tcl lists
+    if isinstance(value, (tuple, list)):
+        value = " ".join(_tclWord(v) for v in value)
+    s = str(value)
+    if s == "":
+        return "{}"
+    return _TCL_SPECIAL.sub(r"\\\1", s).replace("\n", "\\n")
+
+class ShapeBatch:
+
+    """Collects canvas items to create with a single Tk call, in the
+    order they were added, so later items are stacked above earlier
+    ones as if drawn one by one. The option string of each distinct
+    set of options is only built once; every item gets the tags of the
+    batch. Unlike GraphicsObjects, batched items aren't tracked by the
+    GraphWin: move or delete them through their tags."""
+
+    def __init__(self, tags=()):
+        self.tags = (tags,) if isinstance(tags, str) else tuple(tags)
+        self.items = []
+        self.options = {}
+
+    def add(self, kind, coords, text=None, **options):
+        """Add an item of kind "rectangle", "polygon", "line", "oval" or
+        "text" (whose coords are its anchor) with the given Tk options"""
+        key = tuple(sorted(options.items()))
+        opts = self.options.get(key)
+        if opts == None:
+            opts = self.options[key] = "".join(" -{} {}".format(k, _tclWord(v)) for k, v in key)
+        self.items.append((kind, coords, text, opts))
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw(self, graphwin):
+        """Create every item in graphwin and empty the batch"""
+        if graphwin.isClosed(): raise GraphicsError("Can't draw to closed window")
+        trans = graphwin.trans
+        path = graphwin._w
+        tags = " -tags " + _tclWord(self.tags) if self.tags else ""
+        lines = []
+        for kind, coords, text, opts in self.items:
+            if trans:
+                coords = [c for i in range(0, len(coords), 2) for c in trans.screen(coords[i], coords[i+1])]
+            line = "{} create {} {}{}{}".format(path, kind, " ".join(map(str, coords)), opts, tags)
+            if text != None:
+                line += " -text " + _tclWord(text)
+            lines.append(line)
+        if lines:
+            graphwin.tk.eval("\n".join(lines))
+        self.items = []
+        if graphwin.autoflush:
+            _root.update()
+
 def color_rgb(r,g,b):
     """r,g,b are intensities of red, green, and blue in range(256)
     Returns color specifier string for the resulting color"""
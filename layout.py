@@ -0,0 +1,229 @@
+import math
+from simulation import Queue, Process, GroupInfo, Frame
+from tracing import Tracer
+from typing import List, Dict, Iterable, Sequence
+
+# Geometry of the timeline view, independent of any drawing backend. TimelineLayout places the legend, the queue
+# levels and one row per frame, and emits them as shapes into a sink with the interface of graphics.ShapeBatch:
+#   sink.add(kind, coords, text=None, **options)
+# where kind is "rectangle", "polygon", "line" or "text", coords a flat list of x, y pairs (the anchor for texts), and
+# options Tk item options (fill, outline, font). fsosched.GraphicsInfo draws them on a Tk canvas, svgexport.py
+# writes them to an SVG file.
+
+DEFAULT_FONT = ("helvetica", 12, "normal") # graphics.DEFAULT_CONFIG["font"]
+
+# Largest number of processes seen in each leaf queue (by queue id, see simulation.QueueTree) and longest remaining
+# time of a running process over a set of frames, which is all the layout needs to know about them
+class LayoutStats:
+    def __init__(self):
+        self.queuesizes : Dict[int, int] = dict()
+        self.maxpt : int = 0
+        self.frame_count : int = 0
+
+    def add_frame(self, f : Frame):
+        for g in f.groups.values():
+            for q, pl in zip(g.pqueues, g.tasks):
+                if len(pl) > self.queuesizes.get(q.id, -1):
+                    self.queuesizes[q.id] = len(pl)
+            if g.pt > self.maxpt:
+                self.maxpt = g.pt
+        self.frame_count += 1
+
+    # Adds the measurements of other, taken over a different set of frames
+    def merge(self, other : "LayoutStats"):
+        for n, size in other.queuesizes.items():
+            if size > self.queuesizes.get(n, -1):
+                self.queuesizes[n] = size
+        self.maxpt = max(self.maxpt, other.maxpt)
+        self.frame_count += other.frame_count
+
+    # Whether a layout made for these measurements has room for every frame measured by other
+    def covers(self, other : "LayoutStats") -> bool:
+        return other.maxpt <= self.maxpt and all(size <= self.queuesizes.get(n, -1) for n, size in other.queuesizes.items())
+
+    @classmethod
+    def from_frames(cls, frames : Iterable[Frame]) -> "LayoutStats":
+        s = cls()
+        for f in frames:
+            s.add_frame(f)
+        return s
+
+    # The same measurements over the frames a Simulator has produced so far, which it tracks as it runs,
+    # so they are available without going through the frames, and even before the simulation is over
+    @classmethod
+    def from_simulator(cls, sim) -> "LayoutStats":
+        s = cls()
+        for q in sim.tree.queues:
+            if not q.subqueues:
+                s.queuesizes[q.id] = q.max_len
+        s.maxpt = sim.max_pt
+        s.frame_count = sim.frame_count
+        return s
+
+class TimelineLayout:
+    # frames is only iterated once, to measure it; it may also be the LayoutStats of the frames, measured beforehand
+    # (e.g. LayoutStats.from_simulator), in which case building the layout only walks the queue trees
+    def __init__(self, config : dict, cpuq : Queue, ioq : Queue, frames : Iterable[Frame] | LayoutStats, tracer : Tracer | None = None):
+        self.tracer = tracer if tracer != None else Tracer()
+        self.cheight = 0
+        self.maxheight = config.get("max_window_height", 800)
+        self.uwidth : int = config.get("frame_width", 20)
+        self.uheight : int = config.get("item_height", 20)
+        self.ratio = math.sqrt(self.uwidth / self.uheight)
+        self.min_q_size : int = config.get("minimum_queue_size", 1)
+        self.background_c : str = config.get("background_color", "#ffffff")
+        self.border_c : str = config.get("border_color", "#000000")
+        self.edge_c : str = config.get("edge_color", "#000000")
+
+        stats = frames if isinstance(frames, LayoutStats) else LayoutStats.from_frames(frames)
+        self.tracer.debug("layout", "Queue sizes: {}", lambda: str(stats.queuesizes))
+        self.frame_count = stats.frame_count
+        self.maxpt = stats.maxpt
+        # by queue id; cpuq and ioq must have been compiled into a QueueTree, as a Simulator's and a FrameReader's are
+        self.queuesizes : Dict[int, int] = dict(stats.queuesizes)
+        self.queuepositions : Dict[int, int] = dict()
+
+        self.width = self.uwidth * (4 + self.get_queue_max_size(cpuq) + self.get_queue_max_size(ioq))
+
+        self.cpu_levels = self.build_levels(cpuq)
+        self.io_levels = self.build_levels(ioq)
+        self.core_pos : List[int] = list()
+        self.calc_queue_positions([self.cpu_levels, self.io_levels])
+        l = max(len(self.cpu_levels), len(self.io_levels))
+        for lev in [self.cpu_levels, self.io_levels]:
+            while len(lev) < l:
+                lev.append(lev[-1])
+        self.levels_depth = l
+        self.full_height = (self.frame_count + self.levels_depth + 1) * self.uheight
+        self.height = min(self.full_height, self.maxheight)
+
+        self._urdif = self.uwidth / (2 * self.maxpt)
+
+    def get_queue_max_size(self, q : Queue):
+        if q.id in self.queuesizes: return max(self.queuesizes[q.id], self.min_q_size)
+        if q.subqueues:
+            v = sum([self.get_queue_max_size(sq) for sq in q.subqueues])
+            self.queuesizes[q.id] = v
+            return v
+        raise ValueError(f"Asked queue size of unmeasured queue: {q.name} (id {q.id}); measured queue ids are {list(self.queuesizes.keys())}")
+
+    def queue_render_size(self, q : Queue):
+        return self.uwidth * max(self.queuesizes.get(q.id, 0), self.min_q_size)
+
+    def build_levels(self, rootq : Queue):
+        active : Dict[Queue, int] = {rootq: self.get_queue_max_size(rootq)}
+        result = [active]
+        finished = False
+        while not finished:
+            self.tracer.debug("layout", "Level building loop with active length = {}", active.values)
+            na = dict()
+            for q in active.keys():
+                if q.subqueues != []:
+                    for sq in q.subqueues:
+                        na[sq] = self.get_queue_max_size(sq)
+                else:
+                    na[q] = self.get_queue_max_size(q)
+            active = na
+            result.append(active)
+
+            finished = True
+            for q in active.keys():
+                if q.subqueues != []:
+                    finished = False
+
+        self.tracer.debug("layout", "Resulting levels structure: {}", result)
+        return result
+
+    def calc_queue_positions(self, levellist : List[List[Dict[Queue, int]]]):
+        x = self.uwidth * 2
+        for lev in levellist:
+            d = lev[-1]
+            for q, width in d.items():
+                self.queuepositions[q.id] = x
+                x += width * self.uwidth
+            self.core_pos.append(x)
+            x += self.uwidth
+
+    def get_relative_size(self, v : float):
+        return math.sqrt(v / self.maxpt)
+
+    def add_legend(self, sink, processes : Iterable[Process]):
+        xd = self.width / len(processes)
+        x = xd / 2
+        for p in processes:
+            sink.add("text", (x, self.cheight + self.uheight / 2), text=p.name, fill=p.color, font=DEFAULT_FONT)
+            x += xd
+        self.cheight += self.uheight
+        self.add_horizontal_rule(sink)
+
+    def add_horizontal_rule(self, sink):
+        sink.add("line", (0, self.cheight, self.width, self.cheight), fill=self.border_c)
+
+    def add_border(self, sink, x : int, y = -1):
+        if y < 0: y = self.cheight
+        sink.add("line", (x, y, x, y + self.uheight), fill=self.border_c)
+
+    def add_levels(self, sink):
+        x_base = self.uwidth * 2
+        for lev in [self.cpu_levels, self.io_levels]:
+            y = self.cheight
+            for l in lev:
+                x = x_base
+                self.add_border(sink, x, y = y)
+                for q, size in l.items():
+                    self.tracer.debug("layout", "Printing queue {} with size = {}; x = {}, y = {}", q.name, size, x, y)
+                    render_size = self.uwidth * size
+                    sink.add("text", (x + render_size / 2, y + self.uheight / 2), text=q.name, fill=q.color, font=DEFAULT_FONT)
+                    x += render_size
+                    self.add_border(sink, x, y = y)
+                y += self.uheight
+
+            x_base += self.uwidth * sum(lev[0].values()) + self.uwidth
+        self.cheight += self.levels_depth * self.uheight
+        self.add_horizontal_rule(sink)
+
+    # Emits the row of frame f at the current height and moves below it
+    def add_frame(self, sink, f : Frame):
+        x = self.uwidth * 2
+        y = self.cheight
+
+        sink.add("text", (x - self.uwidth, y + self.uheight / 2), text=str(f.t), fill=self.border_c, font=DEFAULT_FONT)
+
+        core_i = 0
+        ri = 0 # index in f.rem of the first process of the next queue
+        for group in f.groups.values():
+            if (p := group.process) != None:
+                dxt = self.uwidth * group.pt / (2 * self.maxpt)
+                dxb = dxt - self._urdif
+                core_x = self.core_pos[core_i] + self.uwidth / 2
+                color = f.processes.color_of(p)
+                sink.add("polygon", (core_x - dxt, y, core_x + dxt, y, core_x + dxb, y + self.uheight, core_x - dxb, y + self.uheight), fill=color, outline=color)
+            self.add_border(sink, x)
+            for q, pl in zip(group.pqueues, group.tasks):
+                pos = self.queuepositions[q.id]
+                wid = self.queue_render_size(q)
+                self.add_queue_processes(sink, pos, wid, f, group, pl, ri)
+                ri += len(pl)
+                if q.name == group.active_queue: continue
+                sink.add("line", (pos, y, pos + wid, y + self.uheight), fill="#808080")
+            x = self.core_pos[core_i] + self.uwidth
+            core_i += 1
+        self.cheight += self.uheight
+
+    # pl is the ids of a leaf queue's processes, whose remaining times start at f.rem[ri]
+    def add_queue_processes(self, sink, pos : int, width : int, f : Frame, g : GroupInfo, pl : Sequence[int], ri : int):
+        x = pos + width - self.uwidth / 2
+        y = self.cheight + self.uheight / 2
+
+        for i, p in enumerate(pl):
+            rs = f.rem[ri + i]
+            dy = self.uheight * self.get_relative_size(rs) / 2
+            dx = dy * self.ratio
+            color = f.processes.color_of(p)
+            if p != g.process:
+                sink.add("rectangle", (x - dx, y - dy, x + dx, y + dy), fill=color, outline=self.edge_c)
+            else:
+                sink.add("polygon", (x - dx, y - dy, x + dx, y, x - dx, y + dy), fill=color, outline=self.edge_c)
+            x -= self.uwidth
+
+        self.add_border(sink, pos + width)
@@ -0,0 +1,151 @@
+import numpy as np
+from typing import List, Dict, Sequence, Iterable
+
+# Vectorized scheduling metrics.
+# Per-process data is held in arrays of shape (processes,) for a single run, or (replications, processes) when
+# several runs of the same workload are stacked; per-queue data likewise with queues instead of processes.
+# Every metric is computed over whole arrays at once, and is NaN for processes that didn't get that far
+# (never dispatched, or not completed before the horizon).
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+class ProcessArrays:
+    def __init__(self, names : List[str], arrival : np.ndarray, completion : np.ndarray, cost : np.ndarray, first_dispatch : np.ndarray):
+        self.names = names
+        self.arrival = arrival
+        self.completion = completion
+        self.cost = cost
+        self.first_dispatch = first_dispatch
+
+    # Copies the columns of the simulator's ProcessTable
+    @classmethod
+    def from_simulator(cls, sim) -> "ProcessArrays":
+        ps = sim.processes
+        n = len(ps)
+        return cls(
+            [ps.name(i) for i in range(n)],
+            np.array(ps.arrival, dtype=np.int64),
+            np.array(ps.completion, dtype=np.int64),
+            np.fromiter((ps.time_cost(i) for i in range(n)), dtype=np.int64, count=n),
+            np.array(ps.first_dispatch, dtype=np.int64))
+
+    # results as returned by Simulator.results()
+    @classmethod
+    def from_results(cls, results : List[dict]) -> "ProcessArrays":
+        def col(k):
+            return np.array([r[k] for r in results], dtype=np.int64)
+        return cls([r["name"] for r in results], col("arrival_time"), col("completion_time"), col("cost"), col("first_dispatch_time"))
+
+    # Stacks runs of the same workload into (replications, processes) arrays
+    @classmethod
+    def stack(cls, runs : Sequence["ProcessArrays"]) -> "ProcessArrays":
+        return cls(runs[0].names,
+                   np.stack([r.arrival for r in runs]),
+                   np.stack([r.completion for r in runs]),
+                   np.stack([r.cost for r in runs]),
+                   np.stack([r.first_dispatch for r in runs]))
+
+    def completed(self) -> np.ndarray:
+        return self.completion >= 0
+
+    def turnaround(self) -> np.ndarray:
+        return np.where(self.completed(), self.completion - self.arrival, np.nan)
+
+    def waiting(self) -> np.ndarray:
+        return self.turnaround() - self.cost
+
+    def response(self) -> np.ndarray:
+        return np.where(self.first_dispatch >= 0, self.first_dispatch - self.arrival, np.nan)
+
+class QueueArrays:
+    # elapsed holds the simulated time of each run: a scalar, or shape (replications,)
+    def __init__(self, names : List[str], busy : np.ndarray, bursts : np.ndarray, elapsed):
+        self.names = names
+        self.busy = busy
+        self.bursts = bursts
+        self.elapsed = np.asarray(elapsed, dtype=np.float64)
+
+    # queue_results as returned by Simulator.queue_results(), elapsed is Simulator.t_now once it finished
+    @classmethod
+    def from_results(cls, queue_results : List[dict], elapsed : int) -> "QueueArrays":
+        return cls([q["queue"] for q in queue_results],
+                   np.array([q["busy"] for q in queue_results], dtype=np.int64),
+                   np.array([q["bursts"] for q in queue_results], dtype=np.int64),
+                   elapsed)
+
+    @classmethod
+    def stack(cls, runs : Sequence["QueueArrays"]) -> "QueueArrays":
+        return cls(runs[0].names,
+                   np.stack([r.busy for r in runs]),
+                   np.stack([r.bursts for r in runs]),
+                   np.array([r.elapsed for r in runs]))
+
+    def _per_time(self, v : np.ndarray) -> np.ndarray:
+        el = self.elapsed[..., np.newaxis] if self.elapsed.ndim else self.elapsed
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(el > 0, v / el, np.nan)
+
+    # fraction of the simulated time the queue had a process running
+    def utilization(self) -> np.ndarray:
+        return self._per_time(self.busy)
+
+    # bursts completed per time unit
+    def throughput(self) -> np.ndarray:
+        return self._per_time(self.bursts)
+
+# Number of processes in every leaf queue at each time unit, as (leaf queue names, array of shape (time units, queues)).
+# Frames that span several time units (event-driven or run length recordings) count once per time unit they cover
+def queue_lengths(frames : Iterable) -> "tuple[List[str], np.ndarray]":
+    names : List[str] = list()
+    rows = list()
+    spans = list()
+    for f in frames:
+        if not names:
+            names = [q.name for g in f.groups.values() for q in g.pqueues]
+        rows.append([len(pl) for g in f.groups.values() for pl in g.tasks])
+        spans.append(f.span)
+    lengths = np.array(rows, dtype=np.int64).reshape(len(rows), len(names))
+    return names, np.repeat(lengths, spans, axis=0)
+
+def percentiles(values : np.ndarray, q : Sequence[float] = DEFAULT_PERCENTILES, axis : int | None = None) -> np.ndarray:
+    return np.nanpercentile(values, q, axis=axis)
+
+# Mean, standard deviation, extremes and percentiles of an array, ignoring NaNs; pass axis to summarize per column
+def describe(values : np.ndarray, q : Sequence[float] = DEFAULT_PERCENTILES, axis : int | None = None) -> Dict[str, np.ndarray]:
+    d = {
+        "count": np.sum(~np.isnan(values), axis=axis),
+        "mean": np.nanmean(values, axis=axis),
+        "std": np.nanstd(values, axis=axis),
+        "min": np.nanmin(values, axis=axis),
+        "max": np.nanmax(values, axis=axis)
+    }
+    for p, v in zip(q, percentiles(values, q, axis)):
+        d[f"p{p:g}"] = v
+    return d
+
+def process_summary(pa : ProcessArrays, q : Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Dict[str, np.ndarray]]:
+    return {
+        "turnaround": describe(pa.turnaround(), q),
+        "waiting": describe(pa.waiting(), q),
+        "response": describe(pa.response(), q)
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from simulation import Simulator
+    parser = argparse.ArgumentParser(description="Prints scheduling metrics of a simulation")
+    parser.add_argument("config", nargs="?", default="config.json")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as config_file:
+        config = json.load(config_file)
+    sim = Simulator(config, event_driven=True)
+    sim.run()
+    for metric, d in process_summary(ProcessArrays.from_simulator(sim)).items():
+        print(f"{metric}: " + ", ".join(f"{k} = {float(v):.2f}" for k, v in d.items()))
+    qa = QueueArrays.from_results(sim.queue_results(), sim.t_now)
+    names, lengths = queue_lengths(sim.frames)
+    mean_length = dict(zip(names, lengths.mean(axis=0)))
+    for n, u, th in zip(qa.names, qa.utilization(), qa.throughput()):
+        print(f"{n}: utilization = {u:.3f}, throughput = {th:.3f}, mean length = {mean_length[n]:.3f}")
@@ -0,0 +1,92 @@
+import csv
+import json
+import math
+import statistics
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict
+from simulation import Simulator
+
+# Independent replications of a configuration whose processes are dispatched to random subqueues.
+# Replication i is seeded with base_seed + i, so any replication can be reproduced on its own with
+# Simulator(config, seed=base_seed + i).
+
+def run_replication(config : dict, seed : int) -> dict:
+    sim = Simulator(config, event_driven=True, seed=seed)
+    sim.run()
+    return {
+        "seed": seed,
+        "processes": sim.results(),
+        "queues": sim.queue_results(),
+        "elapsed": sim.t_now,
+        "horizon_reached": sim.horizon_reached
+    }
+
+def replicate(config : dict, n : int, base_seed : int = 0, workers : int | None = None) -> List[dict]:
+    seeds = [base_seed + i for i in range(n)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_replication, [config] * n, seeds, chunksize=max(1, n // 64)))
+
+# Two-sided critical value of Student's t distribution with df degrees of freedom.
+# Exact for 1 and 2 degrees of freedom, Cornish-Fisher expansion around the normal quantile otherwise.
+def t_critical(df : int, confidence : float = 0.95) -> float:
+    p = 1 - (1 - confidence) / 2
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+def describe(values : List[float], confidence : float = 0.95) -> dict:
+    n = len(values)
+    mean = statistics.fmean(values) if n else math.nan
+    var = statistics.variance(values) if n > 1 else 0.0
+    half = t_critical(n - 1, confidence) * math.sqrt(var / n) if n > 1 else math.nan
+    return {"n": n, "mean": mean, "variance": var, "ci_low": mean - half, "ci_high": mean + half}
+
+# Mean, variance and confidence interval of every per-process and per-queue metric over the replications.
+# Replications that stopped at the horizon are left out, since their metrics aren't final.
+def aggregate(replications : List[dict], confidence : float = 0.95) -> List[dict]:
+    samples : Dict[tuple, List[float]] = dict()
+    for r in replications:
+        if r["horizon_reached"]: continue
+        for p in r["processes"]:
+            for m in ["completion_time", "waiting"]:
+                samples.setdefault(("process", p["name"], m), list()).append(p[m])
+        for q in r["queues"]:
+            for m in ["waiting", "mean_waiting", "bursts"]:
+                samples.setdefault(("queue", q["queue"], m), list()).append(q[m])
+    rows = list()
+    for (scope, name, metric), values in samples.items():
+        row = {"scope": scope, "name": name, "metric": metric}
+        row.update(describe(values, confidence))
+        rows.append(row)
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Runs seeded replications of a configuration in parallel and reports confidence intervals")
+    parser.add_argument("config", nargs="?", default="config.json")
+    parser.add_argument("-n", "--replications", type=int, default=100)
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first replication")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("-c", "--confidence", type=float, default=0.95)
+    parser.add_argument("-o", "--out", help="write the table to this CSV file instead of stdout")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as config_file:
+        config = json.load(config_file)
+    reps = replicate(config, args.replications, args.seed, args.workers)
+    rows = aggregate(reps, args.confidence)
+    truncated = sum(1 for r in reps if r["horizon_reached"])
+    if truncated:
+        print(f"{truncated} of {len(reps)} replications stopped at the horizon and were left out", file=sys.stderr)
+
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=["scope", "name", "metric", "n", "mean", "variance", "ci_low", "ci_high"])
+    writer.writeheader()
+    writer.writerows(rows)
+    if args.out: out.close()
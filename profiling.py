@@ -0,0 +1,72 @@
+import cProfile
+import os
+import time
+from typing import List, Dict, Callable
+
+# Opt-in per-phase profiling. A PhaseProfiler wraps the functions that make up each phase of a tick (or of rendering)
+# so every call adds to the cumulative time and call count of its phase; with cprofile=True each phase also gets its
+# own cProfile.Profile, dumped to <directory>/<phase>.prof by dump(). Nothing is wrapped unless a profiler is given,
+# so unprofiled runs pay nothing for it. Phases must not nest, since cProfile can only run one profile at a time.
+#
+# Simulator(config, profiler=p) times the phases "reallocate_suspended", "check_preemption", "frame" (Frame
+# construction, or recording the frame in the event log) and "burst" (the root queues' Queue.burst calls);
+# fsosched.py adds "layout" (GraphicsInfo construction) and "draw" (GraphicsInfo.draw_frame).
+
+class PhaseStats:
+    def __init__(self, name : str, cprofile : bool = False):
+        self.name = name
+        self.calls : int = 0
+        self.seconds : float = 0.0
+        self.profile : cProfile.Profile | None = cProfile.Profile() if cprofile else None
+
+class PhaseProfiler:
+    def __init__(self, cprofile : bool = False):
+        self.cprofile = cprofile
+        self.phases : Dict[str, PhaseStats] = dict()
+
+    def get_phase(self, name : str) -> PhaseStats:
+        if name not in self.phases:
+            self.phases[name] = PhaseStats(name, self.cprofile)
+        return self.phases[name]
+
+    # Returns fn wrapped so that its calls count towards phase name
+    def wrap(self, name : str, fn : Callable) -> Callable:
+        stats = self.get_phase(name)
+        profile = stats.profile
+        clock = time.perf_counter
+        def timed(*args, **kwargs):
+            if profile != None: profile.enable()
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stats.seconds += clock() - start
+                stats.calls += 1
+                if profile != None: profile.disable()
+        return timed
+
+    def call(self, name : str, fn : Callable, *args, **kwargs):
+        return self.wrap(name, fn)(*args, **kwargs)
+
+    def report(self) -> List[dict]:
+        total = sum(s.seconds for s in self.phases.values())
+        return [{
+            "phase": s.name,
+            "calls": s.calls,
+            "seconds": s.seconds,
+            "mean_us": s.seconds / s.calls * 1e6 if s.calls else 0,
+            "share": s.seconds / total if total else 0
+        } for s in self.phases.values()]
+
+    def format_report(self) -> str:
+        lines = [f"{'phase':<22}{'calls':>10}{'seconds':>12}{'mean us':>12}{'share':>8}"]
+        for r in self.report():
+            lines.append(f"{r['phase']:<22}{r['calls']:>10}{r['seconds']:>12.4f}{r['mean_us']:>12.2f}{r['share']:>8.1%}")
+        return "\n".join(lines)
+
+    # Writes the cProfile data of every phase to directory/<phase>.prof, readable with pstats or snakeviz
+    def dump(self, directory : str):
+        os.makedirs(directory, exist_ok=True)
+        for s in self.phases.values():
+            if s.profile != None:
+                s.profile.dump_stats(os.path.join(directory, f"{s.name}.prof"))
@@ -0,0 +1,315 @@
+import json
+import math
+import os
+import struct
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict
+from framefile import FrameReader
+from layout import TimelineLayout, LayoutStats
+
+# Offscreen raster export of the timeline, for overviews of runs too long for the canvas or even SVG.
+# Works from a frame recording (see framefile.py): the frames are split into tiles of consecutive rows, a process
+# pool measures the tiles for the layout and then rasterizes and encodes each of them, and the tiles are stitched
+# in order into a PPM or PNG file as they come back. The recording is indexed once, so every task seeks straight to
+# its tile and is only given the process records its frames need. scale_y below 1 shrinks every row, e.g.
+# 1 / item_height draws one pixel row per frame. Texts (the legend, queue names and frame numbers) are left out; use
+# svgexport.py for a labelled diagram.
+
+NAMED_COLORS = {"black": (0, 0, 0), "white": (255, 255, 255), "red": (255, 0, 0), "green": (0, 255, 0), "blue": (0, 0, 255),
+                "yellow": (255, 255, 0), "gray": (128, 128, 128), "grey": (128, 128, 128)}
+
+def parse_color(c : str) -> bytes | None:
+    if not c: return None
+    if c.startswith("#"):
+        h = c[1:]
+        if len(h) == 3:
+            return bytes(int(d * 2, 16) for d in h)
+        if len(h) >= 6:
+            step = len(h) // 3 # Tk also accepts 12 and 16 bit channels; keep the top byte
+            return bytes(int(h[i * step:i * step + 2], 16) for i in range(3))
+    return bytes(NAMED_COLORS.get(c.lower(), (128, 128, 128)))
+
+# Shape sink for TimelineLayout (see layout.py) that rasterizes shapes into an RGB buffer covering the canvas rows
+# [y0, y0 + height) of the scaled image
+class RasterCanvas:
+    def __init__(self, width : int, y0 : int, height : int, scale_x : float = 1, scale_y : float = 1, background : str = "#ffffff"):
+        self.width = width
+        self.y0 = y0
+        self.height = height
+        self.sx = scale_x
+        self.sy = scale_y
+        self.pixels = bytearray(parse_color(background) * (width * height))
+        self.colors : Dict[str, bytes | None] = dict()
+
+    def color(self, c : str | None) -> bytes | None:
+        if c not in self.colors:
+            self.colors[c] = parse_color(c)
+        return self.colors[c]
+
+    def span(self, y : int, x0 : int, x1 : int, rgb : bytes):
+        y -= self.y0
+        if not 0 <= y < self.height: return
+        x0, x1 = max(x0, 0), min(x1, self.width)
+        if x1 <= x0: return
+        i = (y * self.width + x0) * 3
+        self.pixels[i:i + (x1 - x0) * 3] = rgb * (x1 - x0)
+
+    # Pixel rows covered by [y1, y2], at least one
+    def rows(self, y1 : float, y2 : float) -> range:
+        a = int(y1)
+        return range(a, max(int(y2), a + 1))
+
+    # One span per pixel row the segment crosses, covering the part of the segment within that row
+    def line(self, x1 : float, y1 : float, x2 : float, y2 : float, rgb : bytes):
+        if y1 > y2:
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        dy = y2 - y1
+        for y in self.rows(y1, y2):
+            if y < self.y0 or y >= self.y0 + self.height: continue
+            if dy == 0:
+                xa, xb = x1, x2
+            else:
+                xa = x1 + (x2 - x1) * min(max((y - y1) / dy, 0), 1)
+                xb = x1 + (x2 - x1) * min(max((y + 1 - y1) / dy, 0), 1)
+            if xa > xb: xa, xb = xb, xa
+            self.span(y, int(xa), int(xb) + 1, rgb)
+
+    # Scanline fill of a convex polygon, sampled at the middle of every pixel row
+    def fill_polygon(self, pts : List[tuple], rgb : bytes):
+        ys = [p[1] for p in pts]
+        for y in self.rows(min(ys), max(ys)):
+            if y < self.y0 or y >= self.y0 + self.height: continue
+            yc = min(max(y + 0.5, min(ys)), max(ys))
+            xs = list()
+            for (xa, ya), (xb, yb) in zip(pts, pts[1:] + pts[:1]):
+                if ya == yb:
+                    if ya == yc: xs += [xa, xb]
+                elif min(ya, yb) <= yc <= max(ya, yb):
+                    xs.append(xa + (xb - xa) * (yc - ya) / (yb - ya))
+            if xs:
+                self.span(y, int(min(xs)), max(int(max(xs)), int(min(xs)) + 1), rgb)
+
+    # Same pixels as fill_polygon and line give for the rectangle's corners and edges, without going through them
+    def rectangle(self, x1 : float, y1 : float, x2 : float, y2 : float, fill : bytes | None, outline : bytes | None):
+        if x1 > x2: x1, x2 = x2, x1
+        if y1 > y2: y1, y2 = y2, y1
+        left, right = int(x1), int(x2)
+        rows = self.rows(y1, y2)
+        rows = range(max(rows.start, self.y0), min(rows.stop, self.y0 + self.height)) # those within the buffer
+        if fill != None:
+            for y in rows:
+                self.span(y, left, max(right, left + 1), fill)
+        if outline != None and outline != fill:
+            self.span(int(y1), left, right + 1, outline)
+            self.span(int(y2), left, right + 1, outline)
+            for y in rows:
+                self.span(y, left, left + 1, outline)
+                self.span(y, right, right + 1, outline)
+
+    # Same defaults as Tk: rectangles are outlined in black and unfilled, polygons filled in black and not outlined
+    def add(self, kind : str, coords, text : str | None = None, **options):
+        if kind == "text": return
+        pts = [(coords[i] * self.sx, coords[i + 1] * self.sy) for i in range(0, len(coords), 2)]
+        if kind == "line":
+            rgb = self.color(options.get("fill", "black"))
+            if rgb != None:
+                for (xa, ya), (xb, yb) in zip(pts, pts[1:]):
+                    self.line(xa, ya, xb, yb, rgb)
+            return
+        if kind == "rectangle":
+            (xa, ya), (xb, yb) = pts
+            self.rectangle(xa, ya, xb, yb, self.color(options.get("fill")), self.color(options.get("outline", "black")))
+            return
+        if kind == "polygon":
+            fill, outline = self.color(options.get("fill", "black")), self.color(options.get("outline"))
+        else:
+            raise ValueError(f"Unsupported shape {kind}")
+        if fill != None:
+            self.fill_polygon(pts, fill)
+        if outline != None and outline != fill:
+            for (xa, ya), (xb, yb) in zip(pts, pts[1:] + pts[:1]):
+                self.line(xa, ya, xb, yb, outline)
+
+# Frame ranges of tile_frames frames each
+def tile_ranges(frame_count : int, tile_frames : int) -> List[tuple]:
+    return [(a, min(a + tile_frames, frame_count)) for a in range(0, frame_count, tile_frames)]
+
+# Measures frames start to stop - 1, whose records start at byte offset, for the layout; returns the measurements and
+# the names of the processes these frames show. The layout only needs the queue sizes and running times, so they are
+# taken from the frame records as they are, without the process records
+def measure_tile(path : str, start : int, stop : int, offset : int) -> tuple:
+    reader = FrameReader(path)
+    stats = LayoutStats()
+    names = set()
+    for r in reader.frame_records(start, stop, offset):
+        for n, g in r["groups"].items():
+            for q in reader.leaves[n]:
+                size = len(g["tasks"][q.name])
+                if size > stats.queuesizes.get(q.id, -1):
+                    stats.queuesizes[q.id] = size
+            if g["pt"] > stats.maxpt:
+                stats.maxpt = g["pt"]
+        stats.frame_count += 1
+        names.update(r["allpt"])
+    return stats, names
+
+# First and last (exclusive) pixel rows of the canvas rows [y1, y2) once scaled
+def pixel_rows(y1 : float, y2 : float, scale_y : float) -> tuple:
+    return round(y1 * scale_y), round(y2 * scale_y)
+
+# Rasterizes the pixel rows of frames start to stop - 1 and returns them encoded by encode (see PpmWriter.encode).
+# Frames first to last - 1 are drawn, clipped to these rows: they include the frames next to the tile whose shapes
+# reach into its rows, so the image doesn't depend on where the tiles are cut. offset is the byte offset of frame
+# first's record, and records are the lines of the process records these frames need that come before it
+def render_tile(path : str, config : dict, stats : LayoutStats, start : int, stop : int, first : int, last : int, offset : int,
+                records : List[bytes], scale_x : float, scale_y : float, encode) -> bytes | tuple:
+    reader = FrameReader(path)
+    reader.add_records(map(json.loads, records))
+    layout = TimelineLayout(config, reader.cpu_queue, reader.io_queue, stats)
+    top = (layout.levels_depth + 1) * layout.uheight # rows start below the legend and the queue levels
+    y0, y1 = pixel_rows(top + start * layout.uheight, top + stop * layout.uheight, scale_y)
+    canvas = RasterCanvas(round(layout.width * scale_x), y0, y1 - y0, scale_x, scale_y, layout.background_c)
+    layout.cheight = top + first * layout.uheight
+    for f in reader.frame_range(first, last, offset):
+        layout.add_frame(canvas, f)
+    return encode(canvas.pixels, canvas.width)
+
+def render_header(path : str, config : dict, stats : LayoutStats, scale_x : float, scale_y : float) -> bytes:
+    reader = FrameReader(path)
+    layout = TimelineLayout(config, reader.cpu_queue, reader.io_queue, stats)
+    _, y1 = pixel_rows(0, (layout.levels_depth + 1) * layout.uheight, scale_y)
+    canvas = RasterCanvas(round(layout.width * scale_x), 0, y1, scale_x, scale_y, layout.background_c)
+    layout.cheight = layout.uheight # the legend row is only text
+    layout.add_horizontal_rule(canvas)
+    layout.add_levels(canvas)
+    return bytes(canvas.pixels)
+
+class PpmWriter:
+    def __init__(self, path : str, width : int, height : int):
+        self.file = open(path, "wb")
+        self.file.write(f"P6\n{width} {height}\n255\n".encode())
+
+    # Turns the pixels of a block of rows into what write takes; called in the worker processes
+    @staticmethod
+    def encode(pixels : bytes, width : int) -> bytes:
+        return bytes(pixels)
+
+    def write(self, block : bytes):
+        self.file.write(block)
+
+    def close(self):
+        self.file.close()
+
+# Adler-32 checksum of the bytes a + b, from the checksums of a and b and the length of b
+def adler32_combine(adler_a : int, adler_b : int, length_b : int) -> int:
+    base = 65521
+    s1 = ((adler_a & 0xffff) + (adler_b & 0xffff) - 1) % base
+    s2 = ((adler_a >> 16) + (adler_b >> 16) + length_b * ((adler_a & 0xffff) - 1)) % base
+    return s2 << 16 | s1
+
+# Streams an 8 bit RGB PNG. The image data is a single zlib stream, but every block of rows is deflated on its own by
+# encode, in the worker processes: a block ends with a sync flush, so that it ends on a byte boundary, and comes with
+# the checksum of its rows, which write combines into that of the stream. Each block goes into an IDAT chunk
+class PngWriter:
+    def __init__(self, path : str, width : int, height : int):
+        self.file = open(path, "wb")
+        self.adler = 1 # checksum of the rows written so far
+        self.file.write(b"\x89PNG\r\n\x1a\n")
+        self.chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        self.chunk(b"IDAT", b"\x78\x9c") # zlib header: deflate with a 32K window
+
+    def chunk(self, kind : bytes, data : bytes):
+        self.file.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+    # Turns the pixels of a block of rows into what write takes: the rows, each after its filter type (None), deflated
+    # without a zlib header, their checksum and their length; called in the worker processes
+    @staticmethod
+    def encode(pixels : bytes, width : int) -> tuple:
+        row_bytes = width * 3
+        rows = bytearray()
+        for i in range(0, len(pixels), row_bytes):
+            rows += b"\x00" + pixels[i:i + row_bytes]
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        return compressor.compress(rows) + compressor.flush(zlib.Z_SYNC_FLUSH), zlib.adler32(rows), len(rows)
+
+    def write(self, block : tuple):
+        data, adler, length = block
+        self.chunk(b"IDAT", data)
+        self.adler = adler32_combine(self.adler, adler, length)
+
+    def close(self):
+        # the last, empty, deflate block, then the checksum the zlib stream ends with
+        self.chunk(b"IDAT", zlib.compressobj(6, zlib.DEFLATED, -15).flush() + struct.pack(">I", self.adler))
+        self.chunk(b"IEND", b"")
+        self.file.close()
+
+# Rasterizes the recording at path into out (.png, otherwise PPM); config is the "graphics" section of the configuration.
+# Returns the size of the image
+def export_raster(path : str, config : dict, out : str, scale_x : float = 1, scale_y : float = 1, tile_frames : int = 4096,
+                  workers : int | None = None) -> tuple:
+    reader = FrameReader(path)
+    tiles = tile_ranges(reader.count_frames(), tile_frames)
+    n = len(tiles)
+    starts, stops = [a for a, _ in tiles], [b for _, b in tiles]
+    offsets = [reader.frame_offsets[a] for a in starts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stats = LayoutStats()
+        names = list()
+        for s, tile_names in pool.map(measure_tile, [path] * n, starts, stops, offsets):
+            stats.merge(s)
+            names.append(tile_names)
+        layout = TimelineLayout(config, reader.cpu_queue, reader.io_queue, stats)
+        # A frame's shapes cover its own rows and the first row of the next frame, and several frames share a pixel row
+        # once a frame is scaled to less than one, so the frames this close to a tile can draw into its rows
+        margin = math.ceil(1 / (scale_y * layout.uheight))
+        firsts = [max(a - margin, 0) for a in starts]
+        lasts = [min(b + margin, len(reader.frame_offsets)) for b in stops]
+        records = list()
+        for a, b in zip(firsts, lasts):
+            # the tile reads the records that come after its first frame along with its frames
+            offset = reader.frame_offsets[a]
+            needed = set().union(*names[a // tile_frames:(b - 1) // tile_frames + 1])
+            records.append([line for o, line in (reader.process_lines[p] for p in needed) if o < offset])
+        width = round(layout.width * scale_x)
+        _, height = pixel_rows(0, layout.full_height, scale_y)
+        writer_class = PngWriter if out.lower().endswith(".png") else PpmWriter
+        writer = writer_class(out, width, height)
+        writer.write(writer_class.encode(render_header(path, config, stats, scale_x, scale_y), width))
+        for block in pool.map(render_tile, [path] * n, [config] * n, [stats] * n, starts, stops, firsts, lasts,
+                              [reader.frame_offsets[a] for a in firsts], records, [scale_x] * n, [scale_y] * n,
+                              [writer_class.encode] * n):
+            writer.write(block)
+        writer.close()
+    return width, height
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from simulation import Simulator
+    from framefile import FrameWriter
+    parser = argparse.ArgumentParser(description="Renders a schedule timeline to a PNG or PPM image with a process pool, without a display")
+    parser.add_argument("config", nargs="?", default="config.json")
+    parser.add_argument("--frames", help="render a recording written by simulation.py --frames instead of simulating")
+    parser.add_argument("--event-driven", action="store_true", help="one row per event instead of per time unit")
+    parser.add_argument("--scale-x", type=float, default=1)
+    parser.add_argument("--scale-y", type=float, default=1, help="e.g. 0.05 draws a 20 pixel high row as 1 pixel")
+    parser.add_argument("--tile-frames", type=int, default=4096, help="frames rendered per task")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("-o", "--out", default="timeline.png")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as config_file:
+        config = json.load(config_file)
+    path = args.frames
+    if path == None:
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        with FrameWriter(path, config) as sink:
+            Simulator(config, event_driven=args.event_driven, sink=sink).run()
+    try:
+        width, height = export_raster(path, config.get("graphics", dict()), args.out, args.scale_x, args.scale_y, args.tile_frames, args.workers)
+        print(f"Wrote a {width}x{height} image to {args.out}")
+    finally:
+        if args.frames == None: os.remove(path)
@@ -0,0 +1,964 @@
+import random
+import re
+from array import array
+from bisect import bisect_right
+from collections import deque
+from itertools import chain, islice
+from typing import List, Dict, Set, Tuple, Iterator, Iterable
+from tracing import Tracer, DEBUG
+
+_untraced = Tracer() # default for queues and frames outside of a Simulator; never subscribe to it
+
+class Policy:
+    def __init__(self, type : str, preemptive : bool):
+        self.preemptive : bool = preemptive
+        self.type : str = type
+        self.key = None # ordering key for policies whose comp is a key difference
+        if type == "Priority":
+            self.comp = lambda ta, tb: ta.priority - tb.priority
+            self.key = lambda t: t.priority
+        elif type == "SJF":
+            self.comp = lambda ta, tb: ta.get_burst() - tb.get_burst()
+            self.key = lambda t: t.get_burst()
+        elif type == "FIFO":
+            self.comp = lambda ta, tb: 1
+        elif type == "FILO":
+            self.comp = lambda ta, tb: -1
+        elif type == "SRTF":
+            self.comp = lambda ta, tb: ta.get_remaining_time() - tb.get_remaining_time()
+            self.key = lambda t: t.get_remaining_time()
+        else:
+            rrm = re.match(r"RR ([0-9]+)", type)
+            if rrm:
+                self.type = "RR"
+                self.comp = lambda ta, tb: 1
+                self.quantum = int(rrm.group(1))
+        self.preempts : bool = preemptive and self.type == "RR" # only pre-emptive RR queues ever pre-empt
+                
+    # holds_queues: whether the list will hold subqueues, whose burst and remaining time change while they wait;
+    # otherwise it holds the ids of processes of the ProcessTable processes
+    def new_task_list(self, holds_queues : bool, processes : "ProcessTable | None" = None) -> "TaskList":
+        if self.type in ["FIFO", "FILO", "RR"]:
+            return DequeTaskList(self)
+        if self.key != None and (self.type == "Priority" or not holds_queues):
+            return OrderedTaskList(self, self.key if holds_queues else self.process_key(processes))
+        return TaskList(self)
+    
+    # self.key for process ids, read straight from the columns of processes
+    def process_key(self, processes : "ProcessTable | None"):
+        if processes == None: return None
+        if self.type == "Priority":
+            return processes.priority.__getitem__
+        elif self.type == "SJF":
+            bursts, pos = processes.bursts, processes.pos
+            return lambda i: bursts[pos[i]]
+        elif self.type == "SRTF":
+            return processes.rem.__getitem__
+        return None
+    
+    def should_preempt(self, queue : "Queue") -> bool:
+        return self.preempts and queue.bursts_since_last >= self.quantum and len(queue.tasks) > 1
+    
+    # Number of bursts until should_preempt fires, assuming the queue's membership doesn't change
+    def bursts_to_preempt(self, queue : "Queue") -> int | None:
+        if self.preempts and len(queue.tasks) > 1:
+            return max(self.quantum - queue.bursts_since_last, 1)
+        return None
+
+
+# Ready list of a queue; the head (index 0) is the active task. A superqueue's tasks are its subqueues, a leaf queue's
+# the ids of its processes
+class TaskList:
+    def __init__(self, policy : Policy):
+        self.policy = policy
+        self.items : List[Task] = list()
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def __iter__(self) -> "Iterator[Task]":
+        return iter(self.items)
+    
+    def peek(self) -> "Task | None":
+        return self.items[0] if self.items else None
+    
+    def pop(self) -> "Task":
+        return self.items.pop(0)
+    
+    # Inserts the task before the first one that compares greater, never before the head if non-preemptive;
+    # returns the insertion position
+    def insert(self, task : "Task") -> int:
+        starts = 0 if self.policy.preemptive else 1
+        for i in range(starts, len(self.items)):
+            if self.policy.comp(task, self.items[i]) < 0:
+                self.items.insert(i, task)
+                return i
+        self.items.append(task)
+        return len(self.items) - 1
+
+# Same ordering as TaskList for key based policies, found by binary search over the keys the tasks had when inserted.
+# Only waiting tasks are compared by stored key: they don't run, so their key can't change. The head may be running,
+# so its key is recomputed when a preemptive insertion has to compare against it.
+# Popped entries are skipped through self.start and compacted lazily, so removing the head is amortized O(1).
+class OrderedTaskList(TaskList):
+    def __init__(self, policy : Policy, key):
+        super().__init__(policy)
+        self.key = key
+        self.keys : List[int] = list()
+        self.start : int = 0
+    
+    def __len__(self) -> int:
+        return len(self.items) - self.start
+    
+    def __iter__(self) -> "Iterator[Task]":
+        return islice(self.items, self.start, None)
+    
+    def peek(self) -> "Task | None":
+        return self.items[self.start] if self.start < len(self.items) else None
+    
+    def pop(self) -> "Task":
+        task = self.items[self.start]
+        self.start += 1
+        if self.start * 2 >= len(self.items):
+            del self.items[:self.start]
+            del self.keys[:self.start]
+            self.start = 0
+        return task
+    
+    def insert(self, task : "Task") -> int:
+        key = self.key(task)
+        h = self.start
+        if h < len(self.items) and self.policy.preemptive:
+            head_key = self.key(self.items[h])
+            if key < head_key:
+                self.keys[h] = head_key # still no greater than any waiting key, so the order holds
+                self.items.insert(h, task)
+                self.keys.insert(h, key)
+                return 0
+        i = bisect_right(self.keys, key, min(h + 1, len(self.keys)))
+        self.items.insert(i, task)
+        self.keys.insert(i, key)
+        return i - h
+
+# FIFO and RR always insert at the back and FILO right before or after the head, so a deque is enough
+class DequeTaskList(TaskList):
+    def __init__(self, policy : Policy):
+        super().__init__(policy)
+        self.items : deque[Task] = deque()
+        self.lifo : bool = policy.type == "FILO"
+    
+    def pop(self) -> "Task":
+        return self.items.popleft()
+    
+    def insert(self, task : "Task") -> int:
+        if not self.lifo or not self.items:
+            self.items.append(task)
+            return len(self.items) - 1
+        if self.policy.preemptive:
+            self.items.appendleft(task)
+            return 0
+        head = self.items.popleft()
+        self.items.appendleft(task)
+        self.items.appendleft(head)
+        return 1
+                  
+# Processes are stored column by column in a ProcessTable, and queues and frames refer to them by id, since a long run
+# holds very many of them; queues and groups are slotted, and frames keep their remaining times in a typed array.
+# Budget on 64 bit CPython 3.11:
+#   Process: 78 bytes in the table, plus its name (a byte per ASCII character) and 6 per burst; a queued process also
+#            costs a deque entry and, above id 256, the int object of its id (8 + 32 bytes)
+#   Frame:   about 340 bytes, plus 310 per root queue, 50 per leaf queue and 16 per process in a queue (an entry of the
+#            leaf's tuple and one of the remaining times array); processes that aren't in a queue cost nothing
+class Task:
+    __slots__ = ("name", "parent_queue", "priority")
+
+    def __init__(self, name : str, priority : int, parent_queue : "Queue | None" = None):
+        self.name = name
+        self.parent_queue : Queue = parent_queue
+        self.priority : int = priority
+    
+    def get_burst(self) -> int:
+        return 1
+    
+    def get_remaining_time(self) -> int:
+        return 1
+
+# Every process of a simulation. Process i (its id) is entry i of every column, and its bursts and the ids of their
+# queues are entries start[i] to start[i + 1] - 1 of bursts and burst_queues; pos[i] is the entry of its current burst.
+# Names are stored back to back as UTF-8 in name_data, and colors as indices into the distinct colors.
+# Indexing the table gives a Process, a view of one row
+class ProcessTable:
+    def __init__(self, tree : "QueueTree"):
+        self.tree = tree # resolves the queue names of the processes added
+        self.name_data = bytearray()
+        self.name_start = array("q", [0])
+        self.colors : List[str] = list()
+        self.color_ids : Dict[str, int] = dict()
+        self.color = array("H")
+        self.priority = array("i")
+        self.start = array("q", [0])
+        self.bursts = array("i")
+        self.burst_queues = array("h")
+        self.pos = array("q")
+        self.rem = array("q")
+        self.arrival = array("q")
+        self.enqueue = array("q") # when the process entered the queue of its current burst
+        self.first_dispatch = array("q")
+        self.completion = array("q")
+        self.parent : List[Queue | None] = list() # leaf queue the process was last added to
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def __getitem__(self, i : int) -> "Process":
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError("process index out of range")
+        return Process(self, i)
+
+    def __iter__(self) -> "Iterator[Process]":
+        for i in range(len(self)):
+            yield Process(self, i)
+
+    # Adds the process described by dictionary (the format of config["processes"]); returns its id
+    def add(self, dictionary : dict) -> int:
+        bursts = dictionary.get("bursts", [0])
+        queue_ids = self.tree.resolve(dictionary.get("queues", [None]))
+        color = dictionary.get("color", "black")
+        if color not in self.color_ids:
+            self.color_ids[color] = len(self.colors)
+            self.colors.append(color)
+        self.name_data += dictionary.get("name", "Process").encode()
+        self.name_start.append(len(self.name_data))
+        self.color.append(self.color_ids[color])
+        self.priority.append(dictionary.get("priority", 0))
+        self.pos.append(len(self.bursts))
+        self.rem.append(bursts[0])
+        self.bursts.extend(bursts)
+        self.burst_queues.extend(queue_ids)
+        self.start.append(len(self.bursts))
+        self.arrival.append(dictionary.get("arrival_time", 0))
+        self.enqueue.append(-1)
+        self.first_dispatch.append(-1)
+        self.completion.append(-1)
+        self.parent.append(None)
+        return len(self.pos) - 1
+
+    def name(self, i : int) -> str:
+        return self.name_data[self.name_start[i]:self.name_start[i + 1]].decode()
+
+    def color_of(self, i : int) -> str:
+        return self.colors[self.color[i]]
+
+    def has_completed(self, i : int) -> bool:
+        return self.pos[i] >= self.start[i + 1]
+
+    def time_cost(self, i : int) -> int:
+        return sum(self.bursts[self.start[i]:self.start[i + 1]])
+
+    # Runs process i for n time units; returns whether that completed its current burst
+    def burst(self, i : int, n : int = 1) -> bool:
+        r = self.rem[i] - n
+        if r > 0:
+            self.rem[i] = r
+            return False
+        p = self.pos[i] + 1
+        self.pos[i] = p
+        self.rem[i] = self.bursts[p] if p < self.start[i + 1] else r
+        return True
+
+# Row i of a ProcessTable, with the attributes of a process. Views are made whenever they are asked for, so compare
+# them with == rather than is
+class Process:
+    __slots__ = ("table", "id")
+
+    def __init__(self, table : ProcessTable, id : int):
+        self.table = table
+        self.id = id
+
+    @property
+    def name(self) -> str:
+        return self.table.name(self.id)
+
+    @property
+    def color(self) -> str:
+        return self.table.color_of(self.id)
+
+    @property
+    def priority(self) -> int:
+        return self.table.priority[self.id]
+
+    @property
+    def bursts(self) -> Tuple[int, ...]:
+        return tuple(self.table.bursts[self.table.start[self.id]:self.table.start[self.id + 1]])
+
+    @property
+    def queue_ids(self) -> Tuple[int, ...]:
+        return tuple(self.table.burst_queues[self.table.start[self.id]:self.table.start[self.id + 1]])
+
+    @property
+    def queues(self) -> Tuple[str, ...]:
+        return tuple(self.table.tree.queues[q].name for q in self.queue_ids)
+
+    @property
+    def current_burst(self) -> int:
+        return self.table.pos[self.id] - self.table.start[self.id]
+
+    @property
+    def rem_time(self) -> int:
+        return self.table.rem[self.id]
+
+    @property
+    def arrival_time(self) -> int:
+        return self.table.arrival[self.id]
+
+    @property
+    def enqueue_time(self) -> int:
+        return self.table.enqueue[self.id]
+
+    @property
+    def first_dispatch_time(self) -> int:
+        return self.table.first_dispatch[self.id]
+
+    @property
+    def completion_time(self) -> int:
+        return self.table.completion[self.id]
+
+    @property
+    def time_cost(self) -> int:
+        return self.table.time_cost(self.id)
+
+    @property
+    def parent_queue(self) -> "Queue | None":
+        return self.table.parent[self.id]
+
+    def get_burst(self) -> int:
+        return self.table.bursts[self.table.pos[self.id]]
+    
+    def get_remaining_time(self) -> int:
+        return self.rem_time
+        
+    def get_queue_name(self) -> str:
+        return self.queues[self.current_burst]
+    
+    def has_completed(self) -> bool:
+        return self.table.has_completed(self.id)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Process) and other.table is self.table and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+                
+    def __str__(self) -> str:
+        return f"{self.name}.{self.current_burst}({self.rem_time})"
+  
+class Queue(Task):
+    __slots__ = ("id", "subqueues", "leaves", "idle", "policy", "tasks", "active", "dirty", "bursts_since_last", "max_len", "processes", "log", "tracer",
+                 "rng", "color")
+
+    def __init__(self, dictionary : dict, parent_queue = None):
+        super().__init__(dictionary.get("name", "Queue"), dictionary.get("priority", 0), parent_queue)
+        
+        self.id : int = -1 # index in the QueueTree the queue is compiled into
+        # queues of this tree whose quantum counter or membership grew since the last check_preemption, the only ones
+        # that may have become due; shared by the whole tree, and only pre-emptive queues add themselves to it
+        self.dirty : Set[Queue] = parent_queue.dirty if parent_queue != None else set()
+        self.subqueues : List[Queue] = [Queue(d, self) for d in dictionary.get("subqueues", [])]
+        self.leaves : List[Queue] = [lq for q in self.subqueues for lq in q.leaves] if self.subqueues else [self] # never changes
+        self.idle : List[Task] = [q for q in self.subqueues]
+        self.policy : Policy = Policy(dictionary.get("mode", "FIFO"), dictionary.get("preemptive", False))
+        self.tasks : TaskList = self.policy.new_task_list(self.subqueues != [])
+        # id of the process at the end of the path of head tasks from this queue down to a leaf, kept up to date by
+        # update_active whenever a head changes, so finding the running process doesn't walk the tree
+        self.active : int | None = None
+        self.bursts_since_last : int = 0
+        self.max_len : int = 0 # most tasks this queue has held at once, for the layout
+        self.processes : ProcessTable | None = None # the processes whose ids leaf queues hold, once a Simulator attaches them
+        self.log = None # EventLog receiving this queue's membership changes, if any
+        self.tracer : Tracer = _untraced
+        self.rng = random # picks the subqueue of processes added to a superqueue; the global generator until a Simulator attaches its own
+        
+        self.color = dictionary.get("color", "#000000")
+        
+    def __len__(self) -> int:
+        return len(self.tasks)
+    
+    def attach_processes(self, processes : ProcessTable):
+        self.processes = processes
+        if not self.subqueues:
+            self.tasks = self.policy.new_task_list(False, processes) # keyed by the table's columns
+        for q in self.subqueues:
+            q.attach_processes(processes)
+    
+    def attach_log(self, log):
+        self.log = log
+        for q in self.subqueues:
+            q.attach_log(log)
+    
+    def attach_tracer(self, tracer : Tracer):
+        self.tracer = tracer
+        for q in self.subqueues:
+            q.attach_tracer(tracer)
+    
+    def attach_rng(self, rng : random.Random):
+        self.rng = rng
+        for q in self.subqueues:
+            q.attach_rng(rng)
+        
+    def get_burst(self) -> int:
+        p = self.active
+        if p == None: return 0
+        else: return self.processes.bursts[self.processes.pos[p]]
+    
+    def get_remaining_time(self) -> int:
+        p = self.active
+        if p == None: return 0
+        else: return self.processes.rem[p]
+    
+    # Id of the running process of this tree, if any
+    def get_active_process(self) -> int | None:
+        return self.active
+    
+    # Called after the head of self.tasks may have changed; passes a change of active process on to the superqueue
+    # if this queue is its head
+    def update_active(self):
+        t = self.tasks.peek()
+        a = t.active if self.subqueues and t != None else t
+        if a != self.active:
+            self.active = a
+            if self.parent_queue != None and self.parent_queue.tasks.peek() is self:
+                self.parent_queue.update_active()
+        
+    def get_active_task(self) -> Task | int | None:
+        return self.tasks.peek()
+    
+    def task_name(self, task : Task | int) -> str:
+        return task.name if isinstance(task, Queue) else self.processes.name(task)
+        
+    # task is a subqueue, or the id of a process
+    def add(self, task : Task | int):
+        is_queue = isinstance(task, Queue)
+        if not self.subqueues and is_queue: raise TypeError("Attempt to insert queue into non-superqueue")
+        
+        if self.subqueues and not is_queue: 
+            subq = self.rng.choice(self.subqueues)
+            subq.add(task)
+        else:
+            pos = self.tasks.insert(task)
+            if len(self.tasks) > self.max_len: self.max_len = len(self.tasks)
+            if pos == 0: self.update_active()
+            if self.policy.preempts: self.dirty.add(self)
+            if self.log != None: self.log.enqueue(self, task, pos)
+            if self.tracer.level <= DEBUG:
+                self.tracer.debug("queue", "inserted process {} in {} (pos {})", self.task_name(task), self.get_structure, pos)
+            if is_queue: task.parent_queue = self
+            else: self.processes.parent[task] = self
+            if self.parent_queue != None:
+                self.parent_queue.awaken(self)
+                
+    def awaken(self, task : Task):
+        if self.tracer.level <= DEBUG:
+            self.tracer.debug("queue", "Awakening {} in {}", task.name, self.name)
+        if task in self.idle:
+            self.idle.remove(task)
+            self.add(task)
+
+    # suspends the active task and sends it to idle; processes aren't kept there, since only subqueues are awakened
+    def suspend(self):
+        self.bursts_since_last = 0
+        if self.tracer.level <= DEBUG:
+            self.tracer.debug("queue", "X Suspending process {} from {}", self.task_name(self.tasks.peek()), self.get_structure)
+        if self.log != None: self.log.dequeue(self)
+        t = self.tasks.pop()
+        if self.subqueues: self.idle.append(t)
+        self.update_active()
+        if self.is_empty() and (self.parent_queue != None):
+            self.parent_queue.suspend()
+    
+    # Pre-empts the due queues of the tree of this root queue, superqueues before their subqueues as in a depth first walk.
+    # Counters are only reset and tasks only removed otherwise, so queues that aren't dirty can't have become due
+    def check_preemption(self):
+        if not self.dirty: return
+        due = sorted(self.dirty, key=lambda q: q.id)
+        self.dirty.clear()
+        for q in due:
+            q.preempt_if_due()
+    
+    def preempt_if_due(self):
+        if self.policy.should_preempt(self):
+            if self.log != None: self.log.preempt(self)
+            self.add(self.tasks.pop())
+            self.update_active() # the task may have gone back anywhere but the head
+            self.bursts_since_last = 0
+    
+    def is_empty(self) -> bool:
+        return len(self.tasks) == 0
+    
+    # First queue named name in a depth first walk of this tree, without recursion; once compiled, QueueTree.ids is faster
+    def find_subtask(self, name : str) -> Task | None:
+        stack = [self]
+        while stack:
+            q = stack.pop()
+            if q.name == name: return q
+            stack.extend(reversed(q.subqueues))
+        return None
+    
+    # Number of bursts until the active process completes or a queue on its path gets pre-empted
+    def bursts_to_event(self) -> int | None:
+        p = self.active
+        if p == None:
+            return None
+        n = self.processes.rem[p]
+        q = self.processes.parent[p] # up the active path, from the leaf to self
+        while True:
+            pn = q.policy.bursts_to_preempt(q)
+            if pn != None and pn < n:
+                n = pn
+            if q is self: return n
+            q = q.parent_queue
+    
+    # Returns the id of the process that completed its burst, if any
+    def burst(self, n : int = 1) -> int | None:
+        p = self.active
+        if p == None:
+            return None
+        leaf = self.processes.parent[p]
+        q = leaf
+        while True:
+            q.bursts_since_last += n
+            if q.policy.preempts: q.dirty.add(q)
+            if q is self: break
+            q = q.parent_queue
+        if self.processes.burst(p, n):
+            leaf.suspend()
+            return p
+        return None
+    
+    # Leaf queues of this tree, left to right; the list is shared, don't change it
+    def get_process_queues(self) -> List["Queue"]:
+        return self.leaves
+        
+    def __str__(self):
+        return self.name
+    
+    def get_structure(self):
+        if self.subqueues:
+            return f"{self.name}={{{' '.join([q.get_structure() for q in self.tasks])}}}"
+        else:
+            return f"{self.name}={{{' '.join([self.processes.name(p) for p in self.tasks])}}}"
+        
+# The queue trees of a simulation compiled into dense integer ids, roots first to last and each tree depth first:
+# queue i is queues[i] (and queues[i].id == i), its superqueue is parent[i] (-1 for roots), its subqueues children[i],
+# and leaves[i] the leaf queues under it from left to right (just i for a leaf). Process queue names are resolved to
+# these ids once, so the simulation loop indexes lists instead of hashing names or walking the trees
+class QueueTree:
+    def __init__(self, roots : List[Queue]):
+        self.roots = roots
+        self.queues : List[Queue] = list()
+        self.parent = array("i")
+        self.children : List[Tuple[int, ...]] = list()
+        self.leaves : List[Tuple[int, ...]] = list()
+        self.ids : Dict[str, int] = dict() # by name; the last queue of a name wins
+        for q in roots:
+            self.compile(q, -1)
+
+    def compile(self, q : Queue, parent : int) -> int:
+        i = len(self.queues)
+        q.id = i
+        self.queues.append(q)
+        self.parent.append(parent)
+        self.children.append(())
+        self.leaves.append((i,))
+        self.ids[q.name] = i
+        if q.subqueues:
+            self.children[i] = tuple(self.compile(sq, i) for sq in q.subqueues)
+            self.leaves[i] = tuple(l for c in self.children[i] for l in self.leaves[c])
+        return i
+
+    def __len__(self) -> int:
+        return len(self.queues)
+
+    def resolve(self, names : Iterable[str]) -> Tuple[int, ...]:
+        try:
+            return tuple(self.ids[n] for n in names)
+        except KeyError as e:
+            raise ValueError(f"Unknown queue {e.args[0]}; recognized queue names are {list(self.ids.keys())}")
+
+class GroupInfo:
+    __slots__ = ("process", "pt", "active_queue", "pqueues", "tasks")
+
+    # process is the id of the running process, and tasks[i] holds the ids of the processes in leaf queue pqueues[i]
+    def __init__(self, q: Queue):
+        self.process : int | None = q.get_active_process()
+        self.pt = q.processes.rem[self.process] if self.process != None else 0
+        self.active_queue : str = "" if self.process == None else q.processes.parent[self.process].name
+        self.pqueues : List[Queue] = q.get_process_queues()
+        self.tasks : Tuple[Tuple[int, ...], ...] = tuple(tuple(lq.tasks) for lq in self.pqueues)
+    
+    @classmethod
+    def from_state(cls, process : int | None, pt : int, active_queue : str, pqueues : List[Queue], tasks : Tuple[Tuple[int, ...], ...]) -> "GroupInfo":
+        g = cls.__new__(cls)
+        g.process = process
+        g.pt = pt
+        g.active_queue = active_queue
+        g.pqueues = pqueues
+        g.tasks = tasks
+        return g
+            
+    # processes is the table the ids of this group refer to
+    def describe(self, processes : ProcessTable) -> str:
+        return f"{(processes.name(self.process) if self.process != None else '-')} " + " ".join([f"{q.name}: {{{' '.join([processes.name(p) for p in pl])}}}" for q, pl in zip(self.pqueues, self.tasks)])
+
+# Ids of the processes in the queues of groups, group by group and leaf queue by leaf queue
+def queued_processes(groups : Dict[str, GroupInfo]) -> Iterator[int]:
+    return chain.from_iterable(pl for g in groups.values() for pl in g.tasks)
+
+# The state of the queues at some time. Processes are referred to by their id in self.processes
+class Frame:
+    __slots__ = ("t", "span", "groups", "rem", "processes")
+
+    # suspended holds the ids of the processes that aren't in a queue
+    def __init__(self, t: int, qlist : List[Queue] = [], processes : ProcessTable | None = None, suspended : List[int] = [], span : int = 1, tracer : Tracer = _untraced):
+        if tracer.level <= DEBUG:
+            tracer.debug("frame", "Creating frame {}; remaining processes: {}", t, lambda: ' '.join([processes.name(p) for p in suspended]))
+        self.t = t
+        self.span = span # number of time units this frame's state lasts
+        self.processes = processes
+        self.groups : Dict[str, GroupInfo] = dict()
+        for q in qlist:
+            self.load_queue(q)
+        # remaining time of every process in a queue, in the order of queued_processes
+        self.rem = array("q")
+        if processes != None:
+            get = processes.rem.__getitem__
+            for g in self.groups.values():
+                for pl in g.tasks:
+                    if pl: self.rem.extend(map(get, pl))
+        if tracer.level <= DEBUG:
+            tracer.debug("frame", "CPU: {} - IO: {} - {}", lambda: self.groups['CPU'].describe(processes), lambda: self.groups['IO'].describe(processes),
+                         lambda: '; '.join([f'{p.name} in {p.parent_queue}' for p in processes]))
+            tracer.debug("frame", "{}", lambda: " - ".join([q.get_structure() for q in qlist]))
+        
+    # rem gives the remaining time of the processes in the queues of groups, in the order of queued_processes
+    @classmethod
+    def from_state(cls, t : int, span : int, groups : Dict[str, GroupInfo], rem : Iterable[int], processes : ProcessTable) -> "Frame":
+        f = cls.__new__(cls)
+        f.t = t
+        f.span = span
+        f.groups = groups
+        f.rem = rem if isinstance(rem, array) else array("q", rem)
+        f.processes = processes
+        return f
+        
+    def load_queue(self, q: Queue):
+        self.groups[q.name] = GroupInfo(q)
+
+    # Ids of the processes in a queue
+    def queued(self) -> Iterator[int]:
+        return queued_processes(self.groups)
+
+    # Remaining time of every process in a queue, by name
+    @property
+    def allpt(self) -> Dict[str, int]:
+        return {self.processes.name(p): r for p, r in zip(self.queued(), self.rem)}
+
+    # Whether this frame is the state of prev after prev.span more time units of the same processes running, i.e. only
+    # the running processes' remaining time changed in between. That of every other process can only change along with
+    # the queue membership, so only the running processes' is compared
+    def continues(self, prev : "Frame") -> bool:
+        if self.t != prev.t + prev.span: return False
+        for n, g in self.groups.items():
+            pg = prev.groups.get(n)
+            if pg == None or g.process != pg.process or g.active_queue != pg.active_queue or g.tasks != pg.tasks: return False
+            if g.process != None and g.pt != pg.pt - prev.span: return False
+        return True
+
+    # The frames of each time unit this frame covers: the same queues, with the running processes' remaining time
+    # going down by one every time unit. A frame spanning a single time unit is its own expansion
+    def expand(self) -> Iterator["Frame"]:
+        if self.span == 1:
+            yield self
+            return
+        running = [i for i, p in enumerate(self.queued()) if any(p == g.process for g in self.groups.values())]
+        for i in range(self.span):
+            groups = {n: GroupInfo.from_state(g.process, g.pt - i if g.process != None else 0, g.active_queue, g.pqueues, g.tasks)
+                      for n, g in self.groups.items()}
+            rem = array("q", self.rem)
+            for j in running:
+                rem[j] -= i
+            yield Frame.from_state(self.t + i, 1, groups, rem, self.processes)
+
+# The per time unit frames of frames that may span several time units each (see Frame.expand), as rendered in tick
+# by tick mode. It can be iterated again whenever frames can
+class ExpandedFrames:
+    def __init__(self, frames : Iterable[Frame]):
+        self.frames = frames
+
+    def __iter__(self) -> Iterator[Frame]:
+        for f in self.frames:
+            yield from f.expand()
+
+class Simulator:
+    # event_driven makes each step jump to the next arrival, completion or pre-emption instead of a single time unit;
+    # trace records an EventLog of state changes instead of a full Frame per step, frames are then rebuilt on demand;
+    # sink receives every frame through sink.write(frame, processes) and frames aren't kept in memory (see framefile.py);
+    # tracer receives the diagnostic events of this simulation, by default a new Tracer without subscribers;
+    # seed seeds the random choice of subqueue for processes added to a superqueue (default: options.seed, else unseeded);
+    # processes replaces config["processes"] with an iterable of process definitions sorted by arrival time, which is
+    # consumed lazily: each process is only created once the simulation reaches its arrival time (see workload.py);
+    # profiler, a profiling.PhaseProfiler, times each phase of the simulation loop
+    def __init__(self, config : dict, event_driven : bool = False, trace : bool = False, sink = None, tracer : Tracer | None = None, seed : int | None = None,
+                 processes : Iterable[dict] | None = None, profiler = None):
+        self.event_driven = event_driven
+        self.sink = sink
+        self.tracer = tracer if tracer != None else Tracer()
+        # last time unit simulated, None to run until every process completes
+        self.horizon : int | None = config.get("options", dict()).get("horizon", 100)
+        self.horizon_reached = False
+        self.cpu_queue = Queue(config["queue_cpu"])
+        self.io_queue = Queue(config["queue_io"])
+        self.roots : List[Queue] = [self.cpu_queue, self.io_queue]
+        self.seed = seed if seed != None else config.get("options", dict()).get("seed")
+        self.rng = random.Random(self.seed)
+        for q in self.roots:
+            q.attach_tracer(self.tracer)
+            q.attach_rng(self.rng)
+        
+        self.tree = QueueTree(self.roots)
+        self.processes = ProcessTable(self.tree)
+        for q in self.roots:
+            q.attach_processes(self.processes)
+        self.queues : Dict[str, Queue] = {n: self.tree.queues[i] for n, i in self.tree.ids.items()}
+        # by queue id, for leaf queues: bursts completed in it and time units processes spent waiting in it for those bursts
+        self.queue_bursts : List[int] = [0] * len(self.tree)
+        self.queue_waiting : List[int] = [0] * len(self.tree)
+        self.queue_busy : List[int] = [0] * len(self.tree) # time units spent running
+        
+        self.suspended_processes : List[int] = list() # ids of the processes that aren't in a queue
+        self.arrivals : Iterator[dict] | None = None
+        self.next_arrival : dict | None = None # first process of self.arrivals not loaded yet
+        self.next_arrival_time : int = 0
+        if processes != None:
+            self.arrivals = iter(processes)
+            self.fetch_arrival()
+        else:
+            for p in config.get("processes", []):
+                self.suspended_processes.append(self.processes.add(p))
+        
+        self.t_now : int = 0
+        self.frame_count : int = 0
+        self.max_pt : int = 0 # longest remaining time of a running process in any frame, for the layout
+        self.log = None
+        self.frames : List[Frame] = list()
+        self.last_frame : Frame | None = None # last frame written to sink, which is all step can return when there is one
+        if trace:
+            from eventlog import EventLog
+            self.log = EventLog(self.roots, self.processes)
+            for q in self.roots:
+                q.attach_log(self.log)
+            self.frames = self.log
+        self.finished = False
+        self.burst_queue = Queue.burst # bursts a root queue; queues are slotted, so a profiler wraps this instead of their method
+        self.profiler = profiler
+        if profiler != None:
+            self.attach_profiler(profiler)
+        
+    def attach_profiler(self, profiler):
+        self.reallocate_suspended = profiler.wrap("reallocate_suspended", self.reallocate_suspended)
+        self.check_preemption = profiler.wrap("check_preemption", self.check_preemption)
+        self.make_frame = profiler.wrap("frame", self.make_frame)
+        if self.log != None:
+            self.log.record_frame = profiler.wrap("frame", self.log.record_frame)
+        self.burst_queue = profiler.wrap("burst", Queue.burst)
+    
+    def fetch_arrival(self):
+        d = next(self.arrivals, None)
+        self.next_arrival = d
+        if d == None: return
+        self.tree.resolve(d.get("queues", [None])) # unknown queues fail before the process is due
+        self.next_arrival_time = d.get("arrival_time", 0)
+        if len(self.processes) and self.next_arrival_time < self.processes.arrival[-1]:
+            raise ValueError(f"Process {d.get('name', 'Process')} arrives before {self.processes[-1].name}; streamed processes must be sorted by arrival time")
+    
+    # Loads the streamed processes that have arrived by now. They go before the processes that just completed a burst,
+    # which is where they would be had they been in config["processes"] from the start
+    def load_arrivals(self):
+        arrived = list()
+        while self.next_arrival != None and self.next_arrival_time <= self.t_now:
+            arrived.append(self.processes.add(self.next_arrival))
+            self.fetch_arrival()
+        if arrived:
+            self.suspended_processes = arrived + self.suspended_processes
+    
+    def reallocate_suspended(self):
+        if self.next_arrival != None:
+            self.load_arrivals()
+        table = self.processes
+        remaining = list()
+        for p in self.suspended_processes:
+            if table.has_completed(p):
+                table.completion[p] = self.t_now
+                if self.log != None: self.log.complete(p, self.t_now)
+            elif self.t_now >= table.arrival[p]:
+                q = self.tree.queues[table.burst_queues[table.pos[p]]]
+                q.add(p)
+                table.enqueue[p] = self.t_now
+            else:
+                remaining.append(p)
+        self.suspended_processes = remaining
+        
+    def check_preemption(self):
+        for q in self.roots:
+            q.check_preemption()
+    
+    # Time units until the next arrival, burst completion, RR quantum expiry or the horizon; at least 1
+    def next_event_delta(self) -> int:
+        delta = None if self.horizon == None else self.horizon + 1 - self.t_now
+        arrivals = [self.processes.arrival[p] for p in self.suspended_processes] + ([self.next_arrival_time] if self.next_arrival != None else [])
+        for a in arrivals:
+            if a > self.t_now and (delta == None or a - self.t_now < delta):
+                delta = a - self.t_now
+        for q in self.roots:
+            n = q.bursts_to_event()
+            if n != None and (delta == None or n < delta):
+                delta = n
+        return 1 if delta == None else max(delta, 1)
+    
+    # Simulates a single time unit (or, if event driven, every time unit up to the next event);
+    # returns False once the simulation is over
+    def advance(self) -> bool:
+        if self.finished: return False
+        self.reallocate_suspended()
+        self.check_preemption()
+        self.finished = self.suspended_processes == [] and self.next_arrival == None and all(q.is_empty() for q in self.roots)
+        span = self.next_event_delta() if self.event_driven and not self.finished else 1
+        if self.log != None:
+            self.log.record_frame(self.t_now, span)
+        if self.sink != None:
+            self.last_frame = self.make_frame(span)
+            self.sink.write(self.last_frame, self.processes)
+        elif self.log == None:
+            self.frames.append(self.make_frame(span))
+        self.frame_count += 1
+        for q in self.roots:
+            p = q.get_active_process()
+            if p != None and self.processes.rem[p] > self.max_pt:
+                self.max_pt = self.processes.rem[p]
+        self.t_now += span
+        
+        if self.horizon != None and self.t_now > self.horizon and not self.finished:
+            self.horizon_reached = True
+            self.finished = True
+            self.tracer.info("simulation", "Stopped at the horizon (t = {}) before every process completed", self.horizon)
+        if self.finished:
+            return True
+        
+        start = self.t_now - span
+        table = self.processes
+        for q in self.roots:
+            p = q.get_active_process()
+            if p == None: continue
+            if table.first_dispatch[p] < 0:
+                table.first_dispatch[p] = start
+            self.queue_busy[table.parent[p].id] += span
+            if self.log != None:
+                self.log.burst(p, span)
+            if self.burst_queue(q, span) != None:
+                self.suspended_processes.append(p)
+                self.account_burst(p)
+        return True
+    
+    def make_frame(self, span : int) -> Frame:
+        return Frame(self.t_now, self.roots, self.processes, self.suspended_processes, span, self.tracer)
+    
+    # Same as advance, but returns the frame recorded, or None once the simulation is over
+    def step(self) -> Frame | None:
+        if not self.advance(): return None
+        return self.last_frame if self.sink != None else self.frames[-1]
+    
+    def run(self) -> List[Frame]:
+        while self.advance():
+            pass
+        return self.frames
+    
+    # Process p just completed a burst in its current parent queue
+    def account_burst(self, p : int):
+        table = self.processes
+        qi = table.parent[p].id
+        self.queue_bursts[qi] += 1
+        self.queue_waiting[qi] += self.t_now - table.enqueue[p] - table.bursts[table.pos[p] - 1]
+    
+    def results(self) -> List[dict]:
+        table = self.processes
+        return [{
+            "name": table.name(i),
+            "cost": table.time_cost(i),
+            "arrival_time": table.arrival[i],
+            "completion_time": table.completion[i],
+            "first_dispatch_time": table.first_dispatch[i],
+            "waiting": table.completion[i] - table.arrival[i] - table.time_cost(i)
+        } for i in range(len(table))]
+    
+    def queue_results(self) -> List[dict]:
+        return [{
+            "queue": q.name,
+            "bursts": self.queue_bursts[q.id],
+            "waiting": self.queue_waiting[q.id],
+            "mean_waiting": self.queue_waiting[q.id] / self.queue_bursts[q.id] if self.queue_bursts[q.id] else 0,
+            "busy": self.queue_busy[q.id]
+        } for q in self.tree.queues if not q.subqueues]
+    
+    def write_results(self, path : str = "out.txt"):
+        with open(path, "w") as out:
+            for r in self.results():
+                out.write(f"{r['name']}: COST = {r['cost']}, TIME RANGE = [{r['arrival_time']}..{r['completion_time']}], WAITING = {r['waiting']}\n")
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from tracing import LEVELS, OFF, print_record
+    parser = argparse.ArgumentParser(description="Runs a scheduling simulation without the visualizer")
+    parser.add_argument("config", nargs="?", default="config.json")
+    parser.add_argument("--horizon", type=int, help="last time unit to simulate (overrides options.horizon)")
+    parser.add_argument("--to-completion", action="store_true", help="simulate until every process completes")
+    parser.add_argument("--event-driven", action="store_true")
+    parser.add_argument("--frames", help="stream every frame to this JSON Lines file")
+    parser.add_argument("--run-length", action="store_true", help="only record the frames where the queues or the running processes change, "
+                        "with the number of time units each lasts (implies --event-driven)")
+    parser.add_argument("--results", default="out.txt")
+    parser.add_argument("--workload", help="JSON workload spec (see workload.py) to generate the processes from, instead of config[\"processes\"]")
+    parser.add_argument("--seed", type=int, help="seed for superqueue dispatch and the workload generator")
+    parser.add_argument("--log-level", default="INFO", choices=list(LEVELS.keys()), help="print trace events of this level and above")
+    parser.add_argument("--profile", action="store_true", help="print the time spent in each phase of the simulation loop")
+    parser.add_argument("--profile-dir", help="also write a cProfile dump of each phase to this directory")
+    args = parser.parse_args()
+    
+    with open(args.config, "r") as config_file:
+        config = json.load(config_file)
+    options = config.setdefault("options", dict())
+    if args.horizon != None: options["horizon"] = args.horizon
+    if args.to_completion: options["horizon"] = None
+    
+    sink = None
+    if args.frames:
+        from framefile import FrameWriter
+        sink = FrameWriter(args.frames, config, run_length=args.run_length)
+    tracer = Tracer()
+    if LEVELS[args.log_level] < OFF:
+        tracer.subscribe(print_record, LEVELS[args.log_level])
+    processes = None
+    if args.workload:
+        from workload import WorkloadGenerator
+        with open(args.workload, "r") as spec_file:
+            processes = WorkloadGenerator(json.load(spec_file), config, args.seed)
+    profiler = None
+    if args.profile or args.profile_dir:
+        from profiling import PhaseProfiler
+        profiler = PhaseProfiler(cprofile=args.profile_dir != None)
+    sim = Simulator(config, event_driven=args.event_driven or args.run_length, sink=sink, tracer=tracer, seed=args.seed, processes=processes, profiler=profiler)
+    sim.run()
+    if sink != None: sink.close()
+    sim.write_results(args.results)
+    if profiler != None:
+        print(profiler.format_report())
+        if args.profile_dir: profiler.dump(args.profile_dir)
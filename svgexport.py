@@ -0,0 +1,101 @@
+from typing import List, Iterable
+from xml.sax.saxutils import escape, quoteattr
+from simulation import Queue, Process, Frame
+from layout import TimelineLayout, LayoutStats
+from tracing import Tracer
+
+# Headless SVG export of the timeline the visualizer draws, without tkinter. Shapes are written to the file as soon as
+# the layout emits them, so only one frame is in memory at a time. Unless their LayoutStats are given (a Simulator
+# tracks them as it runs), frames are iterated twice, once to measure them for the layout and once to draw them,
+# which works for lists, EventLogs and FrameReaders alike.
+
+def fmt(v : float) -> str:
+    return ("%.2f" % v).rstrip("0").rstrip(".")
+
+def points(coords) -> str:
+    return " ".join(f"{fmt(coords[i])},{fmt(coords[i + 1])}" for i in range(0, len(coords), 2))
+
+def paint(color : str | None) -> str:
+    return quoteattr(color) if color else '"none"'
+
+# Shape sink for TimelineLayout (see layout.py) that writes SVG elements to a file
+class SvgWriter:
+    def __init__(self, path : str, width : int, height : int, background : str = "#ffffff"):
+        self.file = open(path, "w")
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.file.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">\n')
+        self.file.write(f'<rect width="100%" height="100%" fill={paint(background)}/>\n')
+        self.file.write('<g stroke-width="1" text-anchor="middle" dominant-baseline="central">\n')
+
+    # Same defaults as Tk: rectangles are outlined in black and unfilled, polygons filled in black and not outlined
+    def add(self, kind : str, coords, text : str | None = None, **options):
+        if kind == "rectangle":
+            x1, x2 = sorted((coords[0], coords[2]))
+            y1, y2 = sorted((coords[1], coords[3]))
+            self.file.write(f'<rect x="{fmt(x1)}" y="{fmt(y1)}" width="{fmt(x2 - x1)}" height="{fmt(y2 - y1)}" '
+                            f'fill={paint(options.get("fill"))} stroke={paint(options.get("outline", "black"))}/>\n')
+        elif kind == "polygon":
+            self.file.write(f'<polygon points="{points(coords)}" fill={paint(options.get("fill", "black"))} stroke={paint(options.get("outline"))}/>\n')
+        elif kind == "line":
+            self.file.write(f'<polyline points="{points(coords)}" fill="none" stroke={paint(options.get("fill", "black"))}/>\n')
+        elif kind == "text":
+            family, size, style = options.get("font", ("helvetica", 12, "normal"))
+            weight = ' font-weight="bold"' if "bold" in style else ""
+            italic = ' font-style="italic"' if "italic" in style else ""
+            self.file.write(f'<text x="{fmt(coords[0])}" y="{fmt(coords[1])}" fill={paint(options.get("fill", "black"))} '
+                            f'font-family={quoteattr(family)} font-size="{size}pt"{weight}{italic}>{escape(text or "")}</text>\n')
+        else:
+            raise ValueError(f"Unsupported shape {kind}")
+
+    def close(self):
+        self.file.write("</g>\n</svg>\n")
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Writes the whole timeline of frames to path; processes may be filled in while frames are first iterated,
+# as a FrameReader does. config is the "graphics" section of the configuration; stats, if known, saves a pass over frames
+def export_svg(path : str, config : dict, cpu_queue : Queue, io_queue : Queue, frames : Iterable[Frame], processes : List[Process],
+               tracer : Tracer | None = None, stats : LayoutStats | None = None) -> TimelineLayout:
+    layout = TimelineLayout(config, cpu_queue, io_queue, stats if stats != None else frames, tracer)
+    with SvgWriter(path, layout.width, layout.full_height, layout.background_c) as svg:
+        layout.add_legend(svg, processes)
+        layout.add_levels(svg)
+        for f in frames:
+            layout.add_frame(svg, f)
+    return layout
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from simulation import Simulator, ExpandedFrames
+    from framefile import FrameReader
+    parser = argparse.ArgumentParser(description="Renders a schedule timeline to an SVG file, without a display")
+    parser.add_argument("config", nargs="?", default="config.json")
+    parser.add_argument("--frames", help="render a recording written by simulation.py --frames instead of simulating")
+    parser.add_argument("--event-driven", action="store_true", help="one row per event instead of per time unit")
+    parser.add_argument("--expand", action="store_true", help="one row per time unit even for frames that span several (event-driven or run length recordings)")
+    parser.add_argument("-o", "--out", default="timeline.svg")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as config_file:
+        config = json.load(config_file)
+    if args.frames:
+        reader = FrameReader(args.frames)
+        frames, processes = reader, reader.processes
+        cpu_queue, io_queue = reader.cpu_queue, reader.io_queue
+        stats = None
+    else:
+        # the event log keeps memory low on long runs, and is read back sequentially
+        sim = Simulator(config, event_driven=args.event_driven, trace=True)
+        frames = sim.run()
+        processes = sim.processes
+        cpu_queue, io_queue = sim.cpu_queue, sim.io_queue
+        stats = LayoutStats.from_simulator(sim)
+    if args.expand:
+        frames, stats = ExpandedFrames(frames), None
+    export_svg(args.out, config.get("graphics", dict()), cpu_queue, io_queue, frames, processes, stats=stats)
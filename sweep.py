@@ -0,0 +1,129 @@
+import copy
+import csv
+import itertools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any
+from simulation import Simulator
+
+# Runs every combination of a set of configuration changes over a base config.json and collects the
+# out.txt metrics of all of them into one table.
+#
+# An axis is a path into the configuration and the values to try for it. Paths are dot separated keys
+# (list indices are numbers), and may start with @<queue name> to address a queue by name anywhere in
+# the queue trees, e.g. "queue_cpu.mode", "@Q0.preemptive" or "processes.0.priority".
+# The special axis "arrival_scale" multiplies every process' arrival time.
+
+ARRIVAL_SCALE = "arrival_scale"
+
+def find_queue(config : dict, name : str) -> dict:
+    pending = [config["queue_cpu"], config["queue_io"]]
+    while pending:
+        q = pending.pop()
+        if q.get("name") == name: return q
+        pending.extend(q.get("subqueues", []))
+    raise KeyError(f"No queue named {name} in the configuration")
+
+def set_path(config : dict, path : str, value : Any):
+    keys = path.split(".")
+    if keys[0].startswith("@"):
+        node = find_queue(config, keys[0][1:])
+        keys = keys[1:]
+    else:
+        node = config
+    for k in keys[:-1]:
+        node = node[int(k)] if isinstance(node, list) else node.setdefault(k, dict())
+    if isinstance(node, list):
+        node[int(keys[-1])] = value
+    else:
+        node[keys[-1]] = value
+
+def apply_variant(base : dict, params : Dict[str, Any]) -> dict:
+    config = copy.deepcopy(base)
+    for path, value in params.items():
+        if path == ARRIVAL_SCALE:
+            for p in config["processes"]:
+                p["arrival_time"] = round(p.get("arrival_time", 0) * value)
+        else:
+            set_path(config, path, value)
+    return config
+
+def variants(axes : Dict[str, list]) -> List[Dict[str, Any]]:
+    names = list(axes.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*[axes[n] for n in names])]
+
+def run_variant(config : dict) -> dict:
+    # seeded so that variants with superqueue dispatch are reproducible; use montecarlo.py for their spread
+    sim = Simulator(config, event_driven=True, seed=config.get("options", dict()).get("seed", 0))
+    sim.run()
+    return {"results": sim.results(), "horizon_reached": sim.horizon_reached}
+
+# Returns one row per variant and process, with the varied parameters as extra columns
+def sweep(base : dict, axes : Dict[str, list], workers : int | None = None) -> List[dict]:
+    params = variants(axes)
+    configs = [apply_variant(base, p) for p in params]
+    rows = list()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, (p, out) in enumerate(zip(params, pool.map(run_variant, configs, chunksize=max(1, len(configs) // 64)))):
+            for r in out["results"]:
+                row = {"variant": i}
+                row.update(p)
+                row.update(r)
+                row["completed"] = r["completion_time"] >= 0 and not out["horizon_reached"]
+                rows.append(row)
+    return rows
+
+def summarize(rows : List[dict], axes : Dict[str, list]) -> List[dict]:
+    summary : Dict[int, dict] = dict()
+    for r in rows:
+        s = summary.setdefault(r["variant"], {"variant": r["variant"], **{n: r[n] for n in axes}, "processes": 0, "completed": 0, "total_waiting": 0, "makespan": 0})
+        s["processes"] += 1
+        if r["completed"]:
+            s["completed"] += 1
+            s["total_waiting"] += r["waiting"]
+            s["makespan"] = max(s["makespan"], r["completion_time"])
+    for s in summary.values():
+        s["mean_waiting"] = s["total_waiting"] / s["completed"] if s["completed"] else None
+    return list(summary.values())
+
+def write_csv(rows : List[dict], path : str):
+    if not rows: return
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        w.writerows(rows)
+
+def parse_value(v : str) -> Any:
+    try:
+        return json.loads(v)
+    except ValueError:
+        return v
+
+def parse_axis(spec : str) -> "tuple[str, list]":
+    path, _, values = spec.partition("=")
+    if not values: raise ValueError(f"Axis {spec} has no values; expected PATH=V1,V2,...")
+    return path, [parse_value(v) for v in values.split(",")]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Simulates every combination of configuration changes in parallel")
+    parser.add_argument("config", nargs="?", default="config.json")
+    parser.add_argument("-a", "--axis", action="append", default=[], metavar="PATH=V1,V2,...",
+                        help='configuration value to vary, e.g. -a "queue_cpu.mode=RR 1,RR 2" -a @Q0.preemptive=true,false -a arrival_scale=1,2')
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("-o", "--out", default="sweep.csv", help="per-process results table")
+    parser.add_argument("--summary", help="per-variant summary table")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as config_file:
+        base = json.load(config_file)
+    axes = dict(parse_axis(a) for a in args.axis)
+    rows = sweep(base, axes, args.workers)
+    write_csv(rows, args.out)
+    summary = summarize(rows, axes)
+    if args.summary:
+        write_csv(summary, args.summary)
+    writer = csv.DictWriter(sys.stdout, fieldnames=list(summary[0].keys()), delimiter="\t")
+    writer.writeheader()
+    writer.writerows(summary)
@@ -0,0 +1,62 @@
+from typing import List, Callable
+
+# Trace levels, as in the logging module
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "OFF": OFF}
+
+# A single traced event. The message is only formatted when a subscriber asks for it;
+# arguments that are callables are called at that point, so expensive descriptions are built lazily too.
+class TraceRecord:
+    def __init__(self, level : int, topic : str, msg : str, args : tuple):
+        self.level = level
+        self.topic = topic
+        self.msg = msg
+        self.args = args
+        self._message : str | None = None
+
+    @property
+    def message(self) -> str:
+        if self._message == None:
+            self._message = self.msg.format(*[a() if callable(a) else a for a in self.args])
+        return self._message
+
+    def __str__(self) -> str:
+        return self.message
+
+# Observer bus for diagnostic events. self.level is the lowest level any subscriber listens to, so hot code can
+# skip building a record entirely with `if tracer.level <= DEBUG:`; with no subscribers that check is all it costs.
+class Tracer:
+    def __init__(self):
+        self.subscribers : List[tuple[int, Callable[[TraceRecord], None]]] = list()
+        self.level : int = OFF
+
+    def subscribe(self, fn : Callable[[TraceRecord], None], level : int = DEBUG):
+        self.subscribers.append((level, fn))
+        self.level = min(self.level, level)
+
+    def unsubscribe(self, fn : Callable[[TraceRecord], None]):
+        self.subscribers = [(l, f) for l, f in self.subscribers if f != fn]
+        self.level = min([l for l, _ in self.subscribers], default=OFF)
+
+    def emit(self, level : int, topic : str, msg : str, *args):
+        if level < self.level: return
+        record = TraceRecord(level, topic, msg, args)
+        for l, fn in self.subscribers:
+            if level >= l:
+                fn(record)
+
+    def debug(self, topic : str, msg : str, *args):
+        self.emit(DEBUG, topic, msg, *args)
+
+    def info(self, topic : str, msg : str, *args):
+        self.emit(INFO, topic, msg, *args)
+
+    def warning(self, topic : str, msg : str, *args):
+        self.emit(WARNING, topic, msg, *args)
+
+def print_record(record : TraceRecord):
+    print(record.message)
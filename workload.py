@@ -0,0 +1,129 @@
+import math
+import random
+from typing import List, Dict, Iterator, Any
+
+# Synthetic workloads: process definitions drawn from configurable distributions, generated lazily in
+# arrival order so they can be fed straight into Simulator(config, processes=WorkloadGenerator(...)).
+#
+# A workload spec is a dict (e.g. loaded from JSON) with these keys, all optional:
+#   "count":       number of processes (default 1000; null for an endless stream, bound it with a horizon)
+#   "arrivals":    {"process": "poisson", "rate": r}  exponential inter-arrival times with mean 1 / r
+#                  {"process": "bursty", "rate": r, "batch": dist}  batches of processes arriving together,
+#                      with the batches themselves arriving as a poisson process of rate r
+#                  {"process": "periodic", "interval": i}  one process every i time units
+#   "cpu_bursts":  distribution of the number of CPU bursts of a process; CPU and IO bursts alternate,
+#                  starting and ending with a CPU burst
+#   "cpu_burst":   distribution of the length of a CPU burst
+#   "io_burst":    distribution of the length of an IO burst
+#   "priority":    distribution of the process priority
+#   "cpu_queues", "io_queues": queue names to target, picked uniformly; by default every leaf queue of the
+#                  configuration's CPU and IO trees
+#   "colors":      colors to cycle through
+# Distributions are dicts with a "dist" key:
+#   {"dist": "constant", "value": v}, {"dist": "uniform", "low": a, "high": b} (integers, inclusive),
+#   {"dist": "exponential", "mean": m}, {"dist": "normal", "mean": m, "std": s},
+#   {"dist": "choice", "values": [...], "weights": [...]}
+# Burst lengths are rounded and at least 1; a plain number is shorthand for a constant.
+
+DEFAULT_COLORS = ["#ffaaaa", "#aaffaa", "#aaaaff", "#ffff66", "#6222ff", "#ff66ff", "#66ffff", "#ff9933"]
+
+DEFAULT_SPEC : Dict[str, Any] = {
+    "count": 1000,
+    "arrivals": {"process": "poisson", "rate": 0.2},
+    "cpu_bursts": {"dist": "uniform", "low": 1, "high": 4},
+    "cpu_burst": {"dist": "exponential", "mean": 4},
+    "io_burst": {"dist": "exponential", "mean": 3},
+    "priority": {"dist": "uniform", "low": 0, "high": 4}
+}
+
+def leaf_names(queue : dict) -> List[str]:
+    subqueues = queue.get("subqueues", [])
+    if not subqueues:
+        return [queue["name"]]
+    return [n for q in subqueues for n in leaf_names(q)]
+
+class Distribution:
+    def __init__(self, spec, rng : random.Random):
+        if not isinstance(spec, dict):
+            spec = {"dist": "constant", "value": spec}
+        self.spec = spec
+        self.rng = rng
+        kind = spec.get("dist", "constant")
+        if kind == "constant":
+            v = spec["value"]
+            self.sample = lambda: v
+        elif kind == "uniform":
+            self.sample = lambda: rng.randint(spec["low"], spec["high"])
+        elif kind == "exponential":
+            self.sample = lambda: rng.expovariate(1 / spec["mean"])
+        elif kind == "normal":
+            self.sample = lambda: rng.gauss(spec["mean"], spec["std"])
+        elif kind == "choice":
+            values, weights = spec["values"], spec.get("weights")
+            self.sample = lambda: rng.choices(values, weights)[0]
+        else:
+            raise ValueError(f"Unknown distribution {kind}")
+
+    def sample_int(self, minimum : int = 0) -> int:
+        return max(minimum, round(self.sample()))
+
+class WorkloadGenerator:
+    def __init__(self, spec : dict, config : dict, seed : int | None = None):
+        self.spec = dict(DEFAULT_SPEC)
+        self.spec.update(spec)
+        self.rng = random.Random(seed)
+        self.count : int | None = self.spec["count"]
+        self.cpu_queues : List[str] = self.spec.get("cpu_queues") or leaf_names(config["queue_cpu"])
+        self.io_queues : List[str] = self.spec.get("io_queues") or leaf_names(config["queue_io"])
+        self.colors : List[str] = self.spec.get("colors") or DEFAULT_COLORS
+
+        self.cpu_bursts = Distribution(self.spec["cpu_bursts"], self.rng)
+        self.cpu_burst = Distribution(self.spec["cpu_burst"], self.rng)
+        self.io_burst = Distribution(self.spec["io_burst"], self.rng)
+        self.priority = Distribution(self.spec["priority"], self.rng)
+
+        arrivals = self.spec["arrivals"]
+        self.arrival_process : str = arrivals.get("process", "poisson")
+        if self.arrival_process not in ["poisson", "bursty", "periodic"]:
+            raise ValueError(f"Unknown arrival process {self.arrival_process}")
+        self.rate : float = arrivals.get("rate", 1)
+        self.interval : float = arrivals.get("interval", 1)
+        self.batch = Distribution(arrivals.get("batch", {"dist": "uniform", "low": 1, "high": 10}), self.rng)
+
+    def arrival_times(self) -> Iterator[int]:
+        t = 0.0
+        while True:
+            if self.arrival_process == "periodic":
+                yield math.floor(t)
+                t += self.interval
+            elif self.arrival_process == "poisson":
+                yield math.floor(t)
+                t += self.rng.expovariate(self.rate)
+            else:
+                for _ in range(self.batch.sample_int(1)):
+                    yield math.floor(t)
+                t += self.rng.expovariate(self.rate)
+
+    def make_process(self, i : int, arrival_time : int) -> dict:
+        bursts, queues = list(), list()
+        n = self.cpu_bursts.sample_int(1)
+        for b in range(n):
+            bursts.append(self.cpu_burst.sample_int(1))
+            queues.append(self.rng.choice(self.cpu_queues))
+            if b < n - 1:
+                bursts.append(self.io_burst.sample_int(1))
+                queues.append(self.rng.choice(self.io_queues))
+        return {
+            "name": f"P{i}",
+            "color": self.colors[i % len(self.colors)],
+            "arrival_time": arrival_time,
+            "priority": self.priority.sample_int(),
+            "bursts": bursts,
+            "queues": queues
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for i, t in enumerate(self.arrival_times()):
+            if self.count != None and i >= self.count:
+                return
+            yield self.make_process(i, t)